@@ -1,8 +1,11 @@
 import streamlit as st
-import time
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from postgrest.exceptions import APIError
+from supabase_conn import get_supabase_client
+from ui import flash, show_flashes
+from geocoding import geocode_columns
 
 # --- Configuración de la página de Streamlit ---
 st.set_page_config(
@@ -26,7 +29,7 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     st.info("Por favor, confíguralas para que la conexión a la base de datos funcione.")
 else:
     try:
-        supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase_client = get_supabase_client()
     except Exception as e:
         st.error(f"Error al inicializar cliente Supabase: {e}")
         supabase_client = None
@@ -194,61 +197,57 @@ def verificar_credenciales_desde_db(email, password):
     """
     Verifica las credenciales del usuario en las tablas de donante, beneficiario y hospital.
     Determina automáticamente el tipo de usuario.
+    Usa la función login_usuario (ver sql/003_login_usuario.sql), que resuelve el tipo
+    de usuario y su ID en una sola consulta indexada por mail.
     """
     if supabase_client is None:
         st.error("Conexión a Supabase no disponible. No se puede verificar credenciales.")
         return False, None, None, None
 
-    user_types = ["Donante", "Beneficiario", "Hospital"]
-    
-    for user_type in user_types:
-        tabla = None
-        id_columna_db = None
-
-        if user_type == "Donante":
-            tabla = "donante"
-            id_columna_db = "id_donante"
-        elif user_type == "Beneficiario":
-            tabla = "beneficiario"
-            id_columna_db = "id_beneficiario"
-        elif user_type == "Hospital":
-            tabla = "hospital"
-            id_columna_db = "id_hospital"
-        
-        try:
-            response = supabase_client.table(tabla).select(f"*, contrafija, {id_columna_db}").eq("mail", email).limit(1).execute()
-            
-            if response.data:
-                usuario_db = response.data[0]
-                
-                if usuario_db.get("contrafija") == password:
-                    user_db_id = usuario_db.get(id_columna_db)
-                    if user_db_id is None:
-                        st.warning(f"No se encontró la columna de ID '{id_columna_db}' en la tabla '{tabla}' para el usuario {email}. La aplicación podría no funcionar correctamente para funcionalidades que requieran el ID. Verifica tu esquema de base de datos.")
-                        return False, None, None, None
-                    return True, email, user_db_id, user_type # Retorna el tipo de usuario encontrado
-        except Exception as e:
-            # En un entorno de producción, podrías querer loggear este error
-            # pero no mostrarlo directamente al usuario para evitar revelar información.
-            # st.error(f"Error al verificar credenciales en Supabase para {user_type}: {e}")
-            pass # Ignoramos el error y continuamos buscando en otras tablas
-    
+    try:
+        response = supabase_client.rpc("login_usuario", {"p_mail": email, "p_contrafija": password}).execute()
+    except Exception as e:
+        # No se muestra el detalle del error al usuario para evitar revelar información.
+        print(f"Error al verificar credenciales en Supabase: {e}")
+        st.error("No se pudieron verificar las credenciales en este momento. Intenta nuevamente.")
+        return False, None, None, None
+
+    if response.data:
+        usuario_db = response.data[0]
+        return True, email, usuario_db.get("id_usuario"), usuario_db.get("tipo_usuario") # Retorna el tipo de usuario encontrado
+
     st.error(f"Credenciales incorrectas o el email '{email}' no se encontró en ninguna de las tablas de usuario.")
     return False, None, None, None # No se encontró ninguna coincidencia
 
+# --- Mensajes para registros duplicados ---
+# Las restricciones UNIQUE están definidas en sql/004_registro_unico.sql.
+MENSAJES_REGISTRO_DUPLICADO = {
+    "donante_dni_key": "El DNI ya está registrado. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.",
+    "donante_mail_key": "El email ya está registrado. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.",
+    "beneficiario_mail_key": "El email ya está registrado. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.",
+    "hospital_mail_key": "El email ya está registrado para un hospital. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.",
+    "hospital_nombre_hospital_key": "Ya existe un hospital registrado con ese nombre. Por favor, verifica tus datos.",
+}
+
+def mensaje_registro_duplicado(error):
+    """
+    Devuelve el mensaje para el usuario si el error es una violación de unicidad (23505),
+    o None si se trata de otro tipo de error.
+    """
+    if getattr(error, "code", None) != "23505":
+        return None
+    detalle = f"{getattr(error, 'message', '')} {getattr(error, 'details', '')}"
+    for restriccion, mensaje in MENSAJES_REGISTRO_DUPLICADO.items():
+        if restriccion in detalle:
+            return mensaje
+    return "Los datos ingresados ya están registrados. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos."
+
 def registrar_donante_en_db(nombre, dni, mail, telefono, direccion, tipo_sangre, edad, sexo, antecedentes, medicaciones, contrafija):
     if supabase_client is None:
         st.error("Conexión a Supabase no disponible. No se puede registrar.")
         return False
     try:
-        existing_dni = supabase_client.table("donante").select("dni").eq("dni", dni).execute()
-        if existing_dni.data and len(existing_dni.data) > 0:
-            st.error("El DNI ya está registrado. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.")
-            return False
-        existing_mail = supabase_client.table("donante").select("mail").eq("mail", mail).execute()
-        if existing_mail.data and len(existing_mail.data) > 0:
-            st.error("El email ya está registrado. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.")
-            return False
+        # DNI y mail únicos los garantiza la base de datos: un solo INSERT, sin consultas previas
         data = {
             "nombred": nombre,
             "dni": dni,
@@ -261,16 +260,25 @@ def registrar_donante_en_db(nombre, dni, mail, telefono, direccion, tipo_sangre,
             "antecedentes": antecedentes,
             "medicaciones": medicaciones,
             "contrafija": contrafija,
-            "cumple_requisitos": False
+            "cumple_requisitos": False,
+            **geocode_columns(direccion), # lat/lon para buscar donantes cerca de un hospital
         }
         response = supabase_client.table("donante").insert(data).execute()
         if response.data:
-            st.success("¡Registro de donante exitoso! Ahora puedes iniciar sesión.")
+            flash("¡Registro de donante exitoso! Ahora puedes iniciar sesión.")
             return True
         else:
             st.error(f"Error al registrar donante: {response.status_code} - {response.data}")
             st.warning("Detalles técnicos del error: " + str(response.error)) 
             return False
+    except APIError as e:
+        mensaje = mensaje_registro_duplicado(e)
+        if mensaje:
+            st.error(mensaje)
+            return False
+        st.error(f"Error al registrar donante en Supabase: {e}")
+        st.exception(e)
+        return False
     except Exception as e:
         st.error(f"Error al registrar donante en Supabase: {e}")
         st.exception(e)
@@ -281,10 +289,7 @@ def registrar_beneficiario_en_db(nombre, mail, telefono, direccion, tipo_sangre,
         st.error("Conexión a Supabase no disponible. No se puede registrar.")
         return False
     try:
-        existing_mail = supabase_client.table("beneficiario").select("mail").eq("mail", mail).execute()
-        if existing_mail.data and len(existing_mail.data) > 0:
-            st.error("El email ya está registrado. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.")
-            return False
+        # El mail único lo garantiza la base de datos: un solo INSERT, sin consultas previas
         data = {
             "nombreb": nombre,
             "mail": mail, "telefono": telefono,
@@ -293,12 +298,20 @@ def registrar_beneficiario_en_db(nombre, mail, telefono, direccion, tipo_sangre,
         }
         response = supabase_client.table("beneficiario").insert(data).execute()
         if response.data:
-            st.success("¡Registro de beneficiario exitoso! Ahora puedes iniciar sesión.")
+            flash("¡Registro de beneficiario exitoso! Ahora puedes iniciar sesión.")
             return True
         else:
             st.error(f"Error al registrar beneficiario: {response.status_code} - {response.data}")
             st.warning("Detalles técnicos del error: " + str(response.error))
             return False
+    except APIError as e:
+        mensaje = mensaje_registro_duplicado(e)
+        if mensaje:
+            st.error(mensaje)
+            return False
+        st.error(f"Error al registrar beneficiario en Supabase: {e}")
+        st.exception(e)
+        return False
     except Exception as e:
         st.error(f"Error al registrar beneficiario en Supabase: {e}")
         st.exception(e)
@@ -309,26 +322,28 @@ def registrar_hospital_en_db(nombre_hospital, direccion, telefono, mail, contraf
         st.error("Conexión a Supabase no disponible. No se puede registrar.")
         return False
     try:
-        existing_mail = supabase_client.table("hospital").select("mail").eq("mail", mail).execute()
-        if existing_mail.data and len(existing_mail.data) > 0:
-            st.error("El email ya está registrado para un hospital. Por favor, **inicia sesión** si ya tienes una cuenta, o verifica tus datos.")
-            return False
-        existing_name = supabase_client.table("hospital").select("nombre_hospital").eq("nombre_hospital", nombre_hospital).execute()
-        if existing_name.data and len(existing_name.data) > 0:
-            st.error("Ya existe un hospital registrado con ese nombre. Por favor, verifica tus datos.")
-            return False
+        # Mail y nombre únicos los garantiza la base de datos: un solo INSERT, sin consultas previas
         data = {
             "nombre_hospital": nombre_hospital, "direccion": direccion,
-            "telefono": telefono, "mail": mail, "contrafija": contrafija
+            "telefono": telefono, "mail": mail, "contrafija": contrafija,
+            **geocode_columns(direccion), # lat/lon para el mapa de hospitales
         }
         response = supabase_client.table("hospital").insert(data).execute()
         if response.data:
-            st.success("¡Registro de hospital exitoso! Ahora puedes iniciar sesión.")
+            flash("¡Registro de hospital exitoso! Ahora puedes iniciar sesión.")
             return True
         else:
             st.error(f"Error al registrar hospital: {response.status_code} - {response.data}")
             st.warning("Detalles técnicos del error: " + str(response.error))
             return False
+    except APIError as e:
+        mensaje = mensaje_registro_duplicado(e)
+        if mensaje:
+            st.error(mensaje)
+            return False
+        st.error(f"Error al registrar hospital en Supabase: {e}")
+        st.exception(e)
+        return False
     except Exception as e:
         st.error(f"Error al registrar hospital en Supabase: {e}")
         st.exception(e)
@@ -349,6 +364,8 @@ if 'current_page' not in st.session_state:
     st.session_state['current_page'] = 'home'
 
 # --- Lógica principal de la aplicación ---
+show_flashes() # Confirmaciones pendientes de la ejecución anterior (login, registro)
+
 if st.session_state['logged_in']:
     st.sidebar.button("Cerrar Sesión", on_click=lambda: st.session_state.update({'logged_in': False, 'user_type': None, 'user_email': None, 'user_db_id': None, 'show_register_form': False, 'current_page': 'home'}))
     st.sidebar.success(f"Sesión iniciada como: **{st.session_state['user_type']}**")
@@ -391,8 +408,7 @@ else: # Si el usuario NO está logueado (mostrar login/registro)
                         st.session_state['user_type'] = user_type_detectado 
                         st.session_state['user_email'] = user_email_logueado
                         st.session_state['user_db_id'] = user_db_id
-                        st.success(f"¡Bienvenido, {user_email_logueado}! Sesión iniciada como {user_type_detectado}.")
-                        time.sleep(1)
+                        flash(f"¡Bienvenido, {user_email_logueado}! Sesión iniciada como {user_type_detectado}.")
                         st.rerun()
 
             st.markdown("---")
@@ -435,7 +451,6 @@ else: # Si el usuario NO está logueado (mostrar login/registro)
                         else:
                             if registrar_donante_en_db(new_nombre, new_dni, new_email, new_telefono, new_direccion, new_tipo_sangre, new_edad, new_sexo, new_antecedentes, new_medicaciones, new_password):
                                 st.session_state['show_register_form'] = False
-                                time.sleep(1)
                                 st.rerun()
 
                 elif register_user_type == "Beneficiario":
@@ -457,7 +472,6 @@ else: # Si el usuario NO está logueado (mostrar login/registro)
                         else:
                             if registrar_beneficiario_en_db(new_nombre_beneficiario, new_email, new_telefono_beneficiario, new_direccion_beneficiario, new_tipo_sangre_beneficiario, new_password):
                                 st.session_state['show_register_form'] = False
-                                time.sleep(1)
                                 st.rerun()
 
                 # La opción de registro de hospital ha sido eliminada de la interfaz de usuario.
@@ -477,7 +491,6 @@ else: # Si el usuario NO está logueado (mostrar login/registro)
                 #         else:
                 #             if registrar_hospital_en_db(new_nombre_hospital, new_direccion_hospital, new_telefono_hospital, new_email, new_password):
                 #                 st.session_state['show_register_form'] = False
-                #                 time.sleep(1)
                 #                 st.rerun()
             
             st.markdown("---")
@@ -0,0 +1,112 @@
+import argparse
+
+import psycopg2
+import psycopg2.extras
+from psycopg2 import sql
+
+from functions import pooled_connection
+from geocoding import get_geocoder
+
+# Tables with an address column and lat/lon columns, and their primary key
+TABLES = {
+    "hospital": "id_hospital",
+    "donante": "id_donante",
+}
+
+
+def backfill_coordinates(table="hospital", batch_size=100, overwrite=False):
+    """
+    Fills in the lat/lon columns of rows that have an address but no coordinates.
+
+    Rows are read in primary key order, batch_size at a time. Each batch is
+    geocoded with geocode_many() (local gazetteer first, OpenCage in parallel
+    for the rest) and written back with a single UPDATE ... FROM (VALUES ...),
+    committed per batch so an interrupted run keeps its progress.
+
+    Args:
+        table (str, optional): One of TABLES. Default is "hospital".
+        batch_size (int, optional): Rows geocoded and updated per batch. Default is 100.
+            Rows whose address cannot be resolved stay NULL and are retried on the next run.
+        overwrite (bool, optional): Geocode every row with an address again, also the
+            ones that already have coordinates. Rows that no longer resolve are set to
+            NULL; rows whose lookup fails keep their coordinates. Default is False.
+
+    Returns:
+        dict: {"rows": rows read, "updated": rows with coordinates written,
+            "unresolved": rows left without coordinates, "errors": {address: message}}.
+    """
+    if table not in TABLES:
+        raise ValueError(f"table must be one of {sorted(TABLES)}.")
+    key = sql.Identifier(TABLES[table])
+    table_sql = sql.Identifier(table)
+
+    select_batch = sql.SQL(
+        "SELECT {key}, direccion FROM {table} "
+        "WHERE {missing} direccion IS NOT NULL AND direccion <> '' AND {key} > %s "
+        "ORDER BY {key} LIMIT %s"
+    ).format(key=key, table=table_sql, missing=sql.SQL("" if overwrite else "lat IS NULL AND"))
+    update_batch = sql.SQL(
+        "UPDATE {table} AS t SET lat = v.lat, lon = v.lon "
+        "FROM (VALUES %s) AS v(id, lat, lon) WHERE t.{key} = v.id"
+    ).format(key=key, table=table_sql)
+
+    geocoder = get_geocoder()
+    summary = {"rows": 0, "updated": 0, "unresolved": 0, "errors": {}}
+    last_id = 0
+    with pooled_connection() as conn:
+        while True:
+            with conn.cursor() as cursor:
+                cursor.execute(select_batch, (last_id, batch_size))
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            coordinates, errors = geocoder.geocode_many([direccion for _, direccion in rows])
+            values = []
+            resolved = 0
+            for row_id, direccion in rows:
+                lat, lon = coordinates.get(direccion, (None, None))
+                if lat is not None and lon is not None:
+                    values.append((row_id, lat, lon))
+                    resolved += 1
+                elif overwrite and direccion in coordinates:
+                    values.append((row_id, None, None)) # No longer resolves: clear the old coordinates
+
+            if values:
+                with conn.cursor() as cursor:
+                    psycopg2.extras.execute_values(
+                        cursor, update_batch.as_string(conn), values,
+                        template="(%s, %s::double precision, %s::double precision)",
+                    )
+            conn.commit()
+
+            summary["rows"] += len(rows)
+            summary["updated"] += resolved
+            summary["unresolved"] += len(rows) - resolved
+            summary["errors"].update(errors)
+            print(f"{table}: {summary['rows']} rows read, {summary['updated']} updated")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode addresses that have no stored coordinates.")
+    parser.add_argument("--table", default="hospital", choices=sorted(TABLES))
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Geocode again rows that already have coordinates.")
+    args = parser.parse_args()
+
+    try:
+        summary = backfill_coordinates(args.table, args.batch_size, args.overwrite)
+    except psycopg2.Error as e:
+        print(f"Error backfilling coordinates: {e}")
+        raise SystemExit(1)
+
+    print(f"Done: {summary['updated']} of {summary['rows']} rows geocoded, {summary['unresolved']} unresolved.")
+    for address, error in summary["errors"].items():
+        print(f"  {address}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Key in st.session_state that holds the per-session cache
+_SESSION_CACHE_KEY = "_session_cache"
+
+# Process-wide shared cache settings: default TTL in seconds and maximum number of entries
+SHARED_CACHE_TTL = float(os.environ.get("SHARED_CACHE_TTL", 60))
+SHARED_CACHE_MAX_ENTRIES = int(os.environ.get("SHARED_CACHE_MAX_ENTRIES", 512))
+
+
+def _session_cache():
+    if _SESSION_CACHE_KEY not in st.session_state:
+        st.session_state[_SESSION_CACHE_KEY] = {}
+    return st.session_state[_SESSION_CACHE_KEY]
+
+
+def session_get(key, default=None):
+    """
+    Returns a value cached for the current Streamlit session, or default if absent.
+
+    Values live in st.session_state, so they survive reruns of the same session
+    but are never shared between users.
+    """
+    return _session_cache().get(key, default)
+
+
+def session_set(key, value):
+    """
+    Caches a value for the current Streamlit session until session_invalidate(key).
+    """
+    _session_cache()[key] = value
+
+
+def session_invalidate(key):
+    """
+    Drops a cached value so the next read goes back to the database. Call it
+    after every write to the data behind the key.
+    """
+    _session_cache().pop(key, None)
+
+
+class _Flight:
+    # One in-progress load that concurrent callers of the same key wait on
+    def __init__(self, tags, generations):
+        self.done = threading.Event()
+        self.tags = tags
+        self.generations = generations
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    """
+    Process-wide read-through cache shared by every Streamlit session.
+
+    Entries are tagged with the tables they were read from and invalidate(*tables)
+    drops every entry that depends on any of them; supabase_conn calls it after
+    each successful insert, update or delete, so the pages never have to.
+    The cache holds at most max_entries values and evicts the least recently
+    used one beyond that.
+
+    Identical reads are coalesced: while one caller (the leader) runs the
+    loader for a key, every other caller of that key waits for the same
+    result instead of sending its own request. Results are fresh for `ttl`
+    seconds; for `stale_ttl` seconds after that the stale value is returned
+    immediately while a single background thread reloads it
+    (stale-while-revalidate).
+
+    Keys are tuples whose first element names the query, e.g.
+    ("hospitales", "donante"); counters are kept per query and per tag.
+    """
+
+    def __init__(self, max_entries=SHARED_CACHE_MAX_ENTRIES, default_ttl=SHARED_CACHE_TTL):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (value, stored_at, tags), least recently used first
+        self._keys_by_tag = {} # table -> keys of the entries tagged with it
+        self._flights = {} # key -> _Flight
+        self._generations = {} # table -> number of invalidations
+        self._query_stats = {}
+        self._tag_stats = {}
+        self._listeners = []
+
+    def _count(self, key, tags, event):
+        for stats, name in [(self._query_stats, key[0])] + [(self._tag_stats, tag) for tag in tags]:
+            counters = stats.setdefault(name, {
+                "hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0,
+            })
+            counters[event] += 1
+
+    def _generations_of(self, tags):
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+
+    def _store(self, key, value, tags):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic(), tags)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _load(self, key, loader, tags, flight):
+        try:
+            flight.value = loader()
+            with self._lock:
+                # A value loaded before an invalidation is handed to the waiting callers but not cached
+                if self._generations_of(tags) == flight.generations:
+                    self._store(key, flight.value, tags)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._count(key, tags, "errors")
+        finally:
+            with self._lock:
+                # invalidate() may already have replaced this flight with a newer one
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _refresh(self, key, loader, tags, flight):
+        self._load(key, loader, tags, flight)
+        if flight.error is not None:
+            print(f"Background refresh of {key[0]} failed, keeping the stale value: {flight.error}")
+
+    def get(self, key, loader, ttl=None, stale_ttl=0, tags=()):
+        """
+        Returns the cached value for key, loading it with loader() when needed.
+
+        Args:
+            key (tuple): Cache key; key[0] names the query for stats.
+            loader (callable): Loads the value. It may run on a background thread,
+                so it must not call Streamlit; let exceptions propagate instead.
+            ttl (float, optional): Seconds a loaded value is served as fresh.
+                Default is SHARED_CACHE_TTL.
+            stale_ttl (float, optional): Extra seconds a value is served while it is
+                refreshed in the background. Default is 0 (no stale serving).
+            tags (iterable of str, optional): Tables the value was read from,
+                including embedded resources and the tables behind views.
+
+        Returns:
+            The loaded value. Values are shared between sessions and must not be modified.
+
+        Raises:
+            Exception: Whatever loader() raised, for the leader and every coalesced caller.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        tags = tuple(tags)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[1] if entry is not None else None
+            if entry is not None and age < ttl:
+                self._entries.move_to_end(key)
+                self._count(key, tags, "hits")
+                return entry[0]
+
+            generations = self._generations_of(tags)
+            flight = self._flights.get(key)
+            if flight is not None and flight.generations != generations:
+                # Started before a write to one of the tags: its result may predate the write
+                flight = None
+            if entry is not None and age < ttl + stale_ttl:
+                self._entries.move_to_end(key)
+                self._count(key, tags, "stale_hits")
+                if flight is None:
+                    flight = self._flights[key] = _Flight(tags, generations)
+                    self._count(key, tags, "refreshes")
+                    threading.Thread(target=self._refresh, args=(key, loader, tags, flight), daemon=True).start()
+                return entry[0]
+
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(tags, generations)
+                self._count(key, tags, "misses")
+            else:
+                self._count(key, tags, "coalesced")
+
+        if leader:
+            self._load(key, loader, tags, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def invalidate(self, *tables):
+        """
+        Drops every cached value that depends on any of tables and notifies the
+        on_invalidate() listeners. Loads already in flight are detached: they
+        still answer the callers that were waiting on them, but their result
+        is not cached and later callers start a new load, so a read issued
+        after a write never gets a value read before it.
+        """
+        written = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._keys_by_tag.pop(table, ())):
+                    if key in self._entries:
+                        self._remove(key)
+            for key, flight in list(self._flights.items()):
+                if written.intersection(flight.tags):
+                    del self._flights[key]
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(set(written))
+            except Exception as e:
+                print(f"Cache invalidation listener failed: {e}")
+
+    def on_invalidate(self, listener):
+        """
+        Registers listener(tables) to be called after every invalidation, for
+        caches kept outside SharedCache that depend on the same tables.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: {"entries", "max_entries", "evictions", "queries": {name: counters},
+                "tags": {table: counters}}, where counters are hits, stale_hits,
+                misses (loads by a leader), coalesced (callers that waited for a
+                leader instead of loading), refreshes (background reloads), errors
+                and hit_rate (share of reads answered without a request of their own).
+        """
+        with self._lock:
+            result = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "queries": {name: dict(counters) for name, counters in self._query_stats.items()},
+                "tags": {tag: dict(counters) for tag, counters in self._tag_stats.items()},
+            }
+        for group in (result["queries"], result["tags"]):
+            for counters in group.values():
+                served = counters["hits"] + counters["stale_hits"] + counters["coalesced"]
+                total = served + counters["misses"]
+                counters["hit_rate"] = served / total if total else 0.0
+        return result
+
+
+_shared_cache = SharedCache()
+
+
+def shared_get(key, loader, ttl=None, stale_ttl=0, tags=()):
+    """
+    Reads through the process-wide SharedCache. See SharedCache.get().
+    """
+    return _shared_cache.get(key, loader, ttl, stale_ttl, tags)
+
+
+def shared_invalidate(*tables):
+    """
+    Drops the process-wide cached values read from any of tables. Writes made
+    with the shared Supabase client call it automatically.
+    """
+    _shared_cache.invalidate(*tables)
+
+
+def on_invalidate(listener):
+    """
+    Registers listener(tables) to be called after every shared cache invalidation.
+    """
+    _shared_cache.on_invalidate(listener)
+
+
+def shared_cache_stats():
+    """
+    Returns the counters of the process-wide SharedCache. See SharedCache.stats().
+    """
+    return _shared_cache.stats()
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from datetime import date
+
+from dotenv import load_dotenv
+
+from cache import on_invalidate
+from matching import BLOOD_COMPATIBILITY_MAP
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Safety net for writes made outside this process (another replica, the SQL
+# editor): the feed is rebuilt at least this often, in seconds.
+CAMPAIGN_FEED_MAX_AGE = float(os.environ.get("CAMPAIGN_FEED_MAX_AGE", 600))
+
+# Tables the feed rows are read from (campaigns embed the beneficiary's blood
+# type and the hospital's name and coordinates)
+CAMPAIGN_FEED_TABLES = {"campana", "beneficiario", "hospital"}
+
+
+def compatible_campaigns(campaigns, donor_type):
+    """
+    Filters the campaigns a donor of donor_type can give to. Campaigns without
+    a beneficiary ("tipo_sangre_beneficiario" is None) accept any blood type.
+    """
+    recipients = BLOOD_COMPATIBILITY_MAP.get(donor_type, [])
+    return [
+        campaign for campaign in campaigns
+        if campaign.get("tipo_sangre_beneficiario") is None
+        or campaign.get("tipo_sangre_beneficiario") in recipients
+    ]
+
+
+class CampaignFeed:
+    """
+    Process-wide cache of the active campaigns compatible with each blood type.
+
+    The eight lists are computed together from a single read of the active
+    campaigns and shared by every donor session, so showing the feed costs a
+    dict lookup. Any write to the tables in CAMPAIGN_FEED_TABLES invalidates it
+    through the shared cache's invalidation listeners; the next reader rebuilds
+    the lists while concurrent readers wait for that one rebuild instead of
+    querying the database themselves.
+    The feed is also rebuilt when the date changes, since campaigns stop being
+    active after their fecha_fin.
+    """
+
+    def __init__(self, max_age=CAMPAIGN_FEED_MAX_AGE):
+        self.max_age = max_age
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+        self._feeds = None
+        self._built_on = None
+        self._built_at = 0.0
+
+    def _is_fresh(self):
+        return (
+            self._feeds is not None
+            and self._built_on == date.today()
+            and time.monotonic() - self._built_at < self.max_age
+        )
+
+    def get(self, donor_type, loader):
+        """
+        Returns the active campaigns compatible with donor_type.
+
+        Args:
+            donor_type (str): A key of BLOOD_COMPATIBILITY_MAP.
+            loader (callable): Returns the list of active campaigns, or None on
+                error. Only called when the feed has to be rebuilt; a None result
+                is returned as an empty list and not cached.
+
+        Returns:
+            list of dict: The campaigns, in the order returned by loader. The
+                list is shared between sessions and must not be modified.
+        """
+        with self._lock:
+            if not self._is_fresh():
+                campaigns = loader()
+                if campaigns is None:
+                    return []
+                self._feeds = {
+                    blood_type: compatible_campaigns(campaigns, blood_type)
+                    for blood_type in BLOOD_COMPATIBILITY_MAP
+                }
+                self._built_on = date.today()
+                self._built_at = time.monotonic()
+                self.rebuilds += 1
+            return self._feeds.get(donor_type, [])
+
+    def invalidate(self):
+        """
+        Drops the cached lists so the next reader rebuilds them.
+        """
+        with self._lock:
+            self._feeds = None
+
+
+_campaign_feed = CampaignFeed()
+
+
+def get_campaign_feed():
+    """
+    Returns the process-wide CampaignFeed shared by every page and session.
+    """
+    return _campaign_feed
+
+
+def _invalidate_on_write(tables):
+    if tables & CAMPAIGN_FEED_TABLES:
+        _campaign_feed.invalidate()
+
+
+# Every insert, update or delete made through the shared Supabase client ends up here
+on_invalidate(_invalidate_on_write)
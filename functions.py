@@ -1,11 +1,78 @@
 import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+from psycopg2 import sql
+import io
+import itertools
 import os
+import select
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import pandas as pd
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Connection pool settings. ThreadedConnectionPool closes every connection given back
+# while it already holds SUPABASE_DB_POOL_MIN idle ones, so only the first MIN
+# connections are reused; by default MIN equals MAX and all of them are kept open.
+DB_POOL_MAX_SIZE = int(os.getenv("SUPABASE_DB_POOL_MAX", 10))
+DB_POOL_MIN_SIZE = int(os.getenv("SUPABASE_DB_POOL_MIN", DB_POOL_MAX_SIZE))
+# Seconds a caller waits for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("SUPABASE_DB_POOL_TIMEOUT", 30))
+# Connections idle for longer than this are closed instead of reused
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("SUPABASE_DB_POOL_IDLE_TIMEOUT", 300))
+# Connections idle for longer than this are checked with SELECT 1 before reuse
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv("SUPABASE_DB_POOL_HEALTH_CHECK_AFTER", 30))
+
+# Change notifications (see sql/007_notificar_cambios.sql). LISTEN needs a session that
+# stays open, which Supabase's transaction pooler (port 6543) does not keep, so the
+# listener only runs when SUPABASE_DB_LISTEN_PORT points at the session pooler or the
+# direct connection (5432).
+DB_NOTIFY_CHANNEL = "cambios_tablas"
+DB_NOTIFY_TABLES = ("campana", "hospital", "donaciones", "beneficiario", "donante")
+DB_LISTEN_PORT = os.getenv("SUPABASE_DB_LISTEN_PORT")
+# Seconds between checks of the stop flag while waiting for notifications. Each quiet
+# interval also runs SELECT 1, so a connection that died without closing is noticed.
+DB_LISTEN_POLL_INTERVAL = float(os.getenv("SUPABASE_DB_LISTEN_POLL_INTERVAL", 5))
+# TCP keepalives on the listening connection, in seconds, so the kernel drops a
+# half-open socket (e.g. after a NAT or pooler restart) instead of waiting forever
+DB_LISTEN_KEEPALIVES_IDLE = int(os.getenv("SUPABASE_DB_LISTEN_KEEPALIVES_IDLE", 30))
+DB_LISTEN_KEEPALIVES_INTERVAL = int(os.getenv("SUPABASE_DB_LISTEN_KEEPALIVES_INTERVAL", 10))
+DB_LISTEN_KEEPALIVES_COUNT = int(os.getenv("SUPABASE_DB_LISTEN_KEEPALIVES_COUNT", 3))
+DB_LISTEN_CONNECT_TIMEOUT = int(os.getenv("SUPABASE_DB_LISTEN_CONNECT_TIMEOUT", 10))
+# Reconnection backoff after the listening connection is lost, in seconds
+DB_LISTEN_BACKOFF = float(os.getenv("SUPABASE_DB_LISTEN_BACKOFF", 1))
+DB_LISTEN_MAX_BACKOFF = float(os.getenv("SUPABASE_DB_LISTEN_MAX_BACKOFF", 60))
+
+
+def _connection_params():
+    """
+    Reads the connection details from environment variables.
+
+    Returns:
+        dict or None: Keyword arguments for psycopg2.connect, or None if any
+            required variable is missing.
+    """
+    host = os.getenv("SUPABASE_DB_HOST")
+    port = os.getenv("SUPABASE_DB_PORT")
+    dbname = os.getenv("SUPABASE_DB_NAME")
+    user = os.getenv("SUPABASE_DB_USER")
+    password = os.getenv("SUPABASE_DB_PASSWORD")
+
+    # Check if all required environment variables are set
+    if not all([host, port, dbname, user, password]):
+        print("Error: One or more Supabase environment variables are not set.")
+        print("Please set SUPABASE_DB_HOST, SUPABASE_DB_PORT, SUPABASE_DB_NAME, SUPABASE_DB_USER, and SUPABASE_DB_PASSWORD.")
+        return None
+
+    return {"host": host, "port": port, "dbname": dbname, "user": user, "password": password}
+
 
 def connect_to_supabase():
     """
@@ -13,27 +80,12 @@ def connect_to_supabase():
     and credentials stored in environment variables.
     """
     try:
-        # Retrieve connection details from environment variables
-        host = os.getenv("SUPABASE_DB_HOST")
-        port = os.getenv("SUPABASE_DB_PORT")
-        dbname = os.getenv("SUPABASE_DB_NAME")
-        user = os.getenv("SUPABASE_DB_USER")
-        password = os.getenv("SUPABASE_DB_PASSWORD")
-
-        # Check if all required environment variables are set
-        if not all([host, port, dbname, user, password]):
-            print("Error: One or more Supabase environment variables are not set.")
-            print("Please set SUPABASE_DB_HOST, SUPABASE_DB_PORT, SUPABASE_DB_NAME, SUPABASE_DB_USER, and SUPABASE_DB_PASSWORD.")
+        params = _connection_params()
+        if params is None:
             return None
 
         # Establish the connection
-        conn = psycopg2.connect(
-            host=host,
-            port=port,
-            dbname=dbname,
-            user=user,
-            password=password,
-        )
+        conn = psycopg2.connect(**params)
         print("Successfully connected to Supabase database.")
         return conn
     except psycopg2.Error as e:
@@ -41,54 +93,325 @@ def connect_to_supabase():
         return None
 
 
-def execute_query(query, conn=None, is_select=True):
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = None
+# Time each idle connection was given back; entries disappear with their connection,
+# so a new connection can never inherit the idle time of a closed one
+_last_used = weakref.WeakKeyDictionary()
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    The pool is a psycopg2 ThreadedConnectionPool, so it can be shared by
+    Streamlit's script runner threads. Its size is configured with
+    SUPABASE_DB_POOL_MIN and SUPABASE_DB_POOL_MAX. The MIN connections are
+    opened up front and kept; connections above MIN are closed as soon as they
+    are given back, so a MIN lower than MAX trades reuse for fewer open
+    connections.
+
+    Returns:
+        psycopg2.pool.ThreadedConnectionPool or None: The pool, or None if the
+            connection details are missing or the database is unreachable.
+    """
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            params = _connection_params()
+            if params is None:
+                return None
+            try:
+                _pool = psycopg2.pool.ThreadedConnectionPool(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, **params)
+            except psycopg2.Error as e:
+                print(f"Error creating Supabase connection pool: {e}")
+                return None
+            _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+        return _pool
+
+
+def close_pool():
+    """
+    Closes every connection of the pool. The next borrow creates a new pool.
+    """
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = None
+        _pool_slots = None
+        _last_used.clear()
+
+
+def _discard(db_pool, conn):
+    _last_used.pop(conn, None)
+    try:
+        db_pool.putconn(conn, close=True)
+    except psycopg2.pool.PoolError:
+        pass
+
+
+def _is_alive(conn):
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _borrow(db_pool):
+    # Skip connections that are closed, idle for too long or fail the health check.
+    # The pool opens a fresh connection once a discarded one is given back.
+    for _ in range(DB_POOL_MAX_SIZE + 1):
+        conn = db_pool.getconn()
+        idle = time.monotonic() - _last_used.get(conn, time.monotonic())
+        if conn.closed:
+            _discard(db_pool, conn)
+        elif idle > DB_POOL_IDLE_TIMEOUT:
+            _discard(db_pool, conn)
+        elif idle > DB_POOL_HEALTH_CHECK_AFTER and not _is_alive(conn):
+            _discard(db_pool, conn)
+        else:
+            return conn
+    raise psycopg2.OperationalError("Could not obtain a healthy connection from the pool.")
+
+
+def _release(db_pool, conn):
+    if conn.closed:
+        _discard(db_pool, conn)
+        return
+    try:
+        # Never hand back a connection with an open or failed transaction
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+    except psycopg2.Error:
+        _discard(db_pool, conn)
+        return
+    _last_used[conn] = time.monotonic()
+    db_pool.putconn(conn)
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrows a connection from the pool for the duration of a with block.
+
+    Waits up to SUPABASE_DB_POOL_TIMEOUT seconds for a free connection. On exit,
+    any uncommitted transaction is rolled back and the connection is returned
+    to the pool.
+
+    Raises:
+        psycopg2.OperationalError: If the pool is unavailable or no connection
+            is freed in time.
+    """
+    db_pool = get_pool()
+    if db_pool is None:
+        raise psycopg2.OperationalError("Supabase connection pool is not available.")
+    slots = _pool_slots
+    if not slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise psycopg2.OperationalError("Timed out waiting for a free database connection.")
+    try:
+        conn = _borrow(db_pool)
+        try:
+            yield conn
+        finally:
+            _release(db_pool, conn)
+    finally:
+        slots.release()
+
+
+class ChangeListener:
+    """
+    Background thread that LISTENs for table change notifications and reports
+    which tables were written to.
+
+    Every replica of the app runs one listener on its own dedicated connection
+    (not borrowed from the pool, since it is held open for as long as the
+    process lives). The triggers of sql/007_notificar_cambios.sql send the name
+    of the written table on DB_NOTIFY_CHANNEL once per statement, so writes made
+    by any replica, by functions.py or from the SQL editor all reach on_change.
+
+    If the connection drops, the listener reconnects with exponential backoff
+    and then reports every table in DB_NOTIFY_TABLES, since notifications sent
+    while it was disconnected are lost. TCP keepalives and a SELECT 1 on every
+    quiet poll interval make sure a half-open connection is detected as a drop.
+
+    Example:
+        listener = ChangeListener(lambda tables: print("changed:", tables))
+        listener.start()
+    """
+
+    def __init__(self, on_change, channel=DB_NOTIFY_CHANNEL, tables=DB_NOTIFY_TABLES):
+        self.on_change = on_change
+        self.channel = channel
+        self.tables = tuple(tables)
+        self.notifications = 0
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+
+    def start(self):
+        """
+        Starts the listening thread (a daemon thread, so it never blocks shutdown).
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="db-change-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Asks the thread to finish and waits up to timeout seconds for it.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _connect(self):
+        params = _connection_params()
+        if params is None:
+            raise psycopg2.OperationalError("Supabase connection details are not configured.")
+        params["port"] = DB_LISTEN_PORT
+        conn = psycopg2.connect(
+            **params,
+            connect_timeout=DB_LISTEN_CONNECT_TIMEOUT,
+            keepalives=1,
+            keepalives_idle=DB_LISTEN_KEEPALIVES_IDLE,
+            keepalives_interval=DB_LISTEN_KEEPALIVES_INTERVAL,
+            keepalives_count=DB_LISTEN_KEEPALIVES_COUNT,
+        )
+        # Notifications are only delivered outside of a transaction
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+        return conn
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+        self._conn = None
+
+    def _notify(self, tables):
+        try:
+            self.on_change(tables)
+        except Exception as e:
+            print(f"Error handling table change notification {sorted(tables)}: {e}")
+
+    def _listen(self):
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._conn], [], [], DB_LISTEN_POLL_INTERVAL)
+            if not readable:
+                # Heartbeat: raises on a dead connection, which sends _run to reconnect
+                with self._conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            self._conn.poll()
+            tables = {notify.payload for notify in self._conn.notifies if notify.payload}
+            self._conn.notifies.clear()
+            if tables:
+                self.notifications += 1
+                self._notify(tables)
+
+    def _run(self):
+        backoff = DB_LISTEN_BACKOFF
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                self._conn = self._connect()
+                if connected_before:
+                    # Writes made while disconnected were never notified
+                    self.reconnects += 1
+                    self._notify(set(self.tables))
+                connected_before = True
+                backoff = DB_LISTEN_BACKOFF
+                self._listen()
+            except (psycopg2.Error, OSError) as e:
+                print(f"Table change listener disconnected, retrying in {backoff:.1f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, DB_LISTEN_MAX_BACKOFF)
+            finally:
+                self._close()
+
+
+_change_listener = None
+_change_listener_lock = threading.Lock()
+
+
+def start_change_listener(on_change):
+    """
+    Starts the process-wide ChangeListener once; later calls are no-ops.
+
+    Args:
+        on_change (callable): Called from the listener thread with the set of
+            table names written to, e.g. cache.shared_invalidate(*tables).
+
+    Returns:
+        ChangeListener or None: The running listener, or None if
+            SUPABASE_DB_LISTEN_PORT or the connection details are not configured.
+    """
+    global _change_listener
+    if not DB_LISTEN_PORT:
+        return None
+    with _change_listener_lock:
+        if _change_listener is None:
+            if _connection_params() is None:
+                return None
+            _change_listener = ChangeListener(on_change)
+            _change_listener.start()
+        return _change_listener
+
+
+def _run_query(conn, query, is_select, params=None):
+    # Create cursor and execute query; values in params are bound by psycopg2
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+
+        if is_select:
+            # Fetch all results for SELECT queries
+            results = cursor.fetchall()
+
+            # Get column names from cursor description
+            colnames = [desc[0] for desc in cursor.description]
+
+            # Create DataFrame
+            return pd.DataFrame(results, columns=colnames)
+
+    # For DML operations, commit changes and return success
+    conn.commit()
+    return True
+
+
+def execute_query(query, conn=None, is_select=True, params=None):
     """
     Executes a SQL query and returns the results as a pandas DataFrame for SELECT queries,
     or executes DML operations (INSERT, UPDATE, DELETE) and returns success status.
     
     Args:
-        query (str): The SQL query to execute
+        query (str): The SQL query to execute, with %s or %(name)s placeholders
+            for bound parameters
         conn (psycopg2.extensions.connection, optional): Database connection object.
-            If None, a new connection will be established.
+            If None, a connection is borrowed from the pool and returned afterwards.
         is_select (bool, optional): Whether the query is a SELECT query (True) or 
             a DML operation like INSERT/UPDATE/DELETE (False). Default is True.
+        params (tuple or dict, optional): Values bound to the query placeholders.
+            Never format values into the query string yourself.
             
     Returns:
         pandas.DataFrame or bool: A DataFrame containing the query results for SELECT queries,
             or True for successful DML operations, False otherwise.
     """
     try:
-        # Create a new connection if one wasn't provided
-        close_conn = False
         if conn is None:
-            conn = connect_to_supabase()
-            close_conn = True
-        
-        # Create cursor and execute query
-        cursor = conn.cursor()
-        cursor.execute(query)
-        
-        if is_select:
-            # Fetch all results for SELECT queries
-            results = cursor.fetchall()
-            
-            # Get column names from cursor description
-            colnames = [desc[0] for desc in cursor.description]
-            
-            # Create DataFrame
-            df = pd.DataFrame(results, columns=colnames)
-            result = df
-        else:
-            # For DML operations, commit changes and return success
-            conn.commit()
-            result = True
-        
-        # Close cursor and connection if we created it
-        cursor.close()
-        if close_conn:
-            conn.close()
-            
-        return result
+            # The pooled connection is rolled back on error when it is returned
+            with pooled_connection() as pooled_conn:
+                return _run_query(pooled_conn, query, is_select, params)
+        return _run_query(conn, query, is_select, params)
     except Exception as e:
         print(f"Error executing query: {e}")
         # Rollback any changes if an error occurred during DML operation
@@ -96,6 +419,177 @@ def execute_query(query, conn=None, is_select=True):
             conn.rollback()
         return pd.DataFrame() if is_select else False  
 
+def _stream_chunks(conn, query, params, chunk_size):
+    # A named cursor keeps the result set on the server; rows are pulled chunk by chunk
+    with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(query, params)
+        colnames = None
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if colnames is None:
+                colnames = [desc[0] for desc in cursor.description]
+            yield pd.DataFrame(rows, columns=colnames)
+
+
+def stream_query(query, params=None, chunk_size=10000, conn=None):
+    """
+    Runs a SELECT query with a server-side cursor and yields the results in chunks,
+    so large result sets never have to fit in memory at once.
+
+    Args:
+        query (str): The SELECT query to execute, with %s or %(name)s placeholders
+        params (tuple or dict, optional): Values bound to the query placeholders
+        chunk_size (int, optional): Maximum number of rows per DataFrame. Default is 10000.
+        conn (psycopg2.extensions.connection, optional): Database connection object.
+            If None, a connection is borrowed from the pool for as long as the
+            generator is being consumed.
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks of at most chunk_size rows.
+
+    Raises:
+        psycopg2.Error: If the query fails. Unlike execute_query, errors are not
+            swallowed, since a partially consumed stream cannot be reported as empty.
+
+    Example:
+        for chunk in stream_query("SELECT * FROM donaciones WHERE id_campana = %s", (7,)):
+            chunk.to_csv("donaciones.csv", mode="a", header=False)
+    """
+    if conn is None:
+        with pooled_connection() as pooled_conn:
+            yield from _stream_chunks(pooled_conn, query, params, chunk_size)
+    else:
+        yield from _stream_chunks(conn, query, params, chunk_size)
+
+
+def _restore_integer_columns(frame):
+    # pandas stores an integer column with missing values as float64, so 7 would be
+    # written as "7.0", which COPY rejects for integer columns. Float columns that only
+    # hold whole numbers go back to the nullable Int64 dtype.
+    frame = frame.copy()
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_float_dtype(values):
+            present = values.dropna()
+            if len(present) and (present % 1 == 0).all():
+                frame[column] = values.astype("Int64")
+    return frame
+
+
+def _row_batches(rows, columns, batch_size):
+    # Normalizes a DataFrame or an iterable of tuples/dicts into (columns, batch) pairs
+    if isinstance(rows, pd.DataFrame):
+        columns = list(columns or rows.columns)
+        frame = _restore_integer_columns(rows[columns])
+        # NaN/NaT/NA become None so they are loaded as NULL
+        frame = frame.astype(object).where(pd.notna(frame), None)
+        for start in range(0, len(frame), batch_size):
+            yield columns, list(frame.iloc[start:start + batch_size].itertuples(index=False, name=None))
+        return
+
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        if isinstance(batch[0], dict):
+            columns = list(columns or batch[0].keys())
+            batch = [tuple(row.get(column) for column in columns) for row in batch]
+        elif columns is None:
+            raise ValueError("columns is required when rows are not dicts or a DataFrame.")
+        yield columns, batch
+
+
+def _csv_field(value):
+    # Only None is left as an unquoted empty field, which COPY ... CSV reads as NULL;
+    # everything else is quoted, so empty strings stay empty strings
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_batch(cursor, table_sql, columns, batch):
+    buffer = io.StringIO()
+    for row in batch:
+        buffer.write(",".join(_csv_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        table_sql, sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    cursor.copy_expert(statement.as_string(cursor), buffer)
+
+
+def _values_batch(cursor, table_sql, columns, batch):
+    statement = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        table_sql, sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    psycopg2.extras.execute_values(cursor, statement.as_string(cursor), batch, page_size=len(batch))
+
+
+def _bulk_insert(conn, table, rows, columns, batch_size, method):
+    load_batch = _copy_batch if method == "copy" else _values_batch
+    table_sql = sql.Identifier(*table.split("."))
+    result = {"rows": 0, "batches": [], "seconds": 0.0}
+    started = time.perf_counter()
+    try:
+        for batch_columns, batch in _row_batches(rows, columns, batch_size):
+            batch_started = time.perf_counter()
+            with conn.cursor() as cursor:
+                load_batch(cursor, table_sql, batch_columns, batch)
+            # Each batch is committed on its own, so a failure keeps the batches already loaded
+            conn.commit()
+            result["rows"] += len(batch)
+            result["batches"].append({"rows": len(batch), "seconds": time.perf_counter() - batch_started})
+    except Exception as e:
+        print(f"Error loading batch {len(result['batches']) + 1} into {table}: {e}")
+        conn.rollback()
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def bulk_insert(table, rows, columns=None, batch_size=5000, method="copy", conn=None):
+    """
+    Loads many rows into a table in batches, using COPY FROM STDIN or multi-row
+    INSERT ... VALUES statements instead of one INSERT per row.
+
+    Args:
+        table (str): Target table, optionally schema-qualified (e.g. "public.donante")
+        rows (pandas.DataFrame or iterable): A DataFrame, or an iterable (such as a
+            generator) of dicts or tuples. Rows are consumed batch by batch.
+        columns (list of str, optional): Target columns. Defaults to the DataFrame
+            columns or the keys of the first dict; required for tuple rows.
+        batch_size (int, optional): Rows per batch. Default is 5000.
+        method (str, optional): "copy" (COPY FROM STDIN, fastest) or "values"
+            (execute_values, useful where COPY is not allowed). Default is "copy".
+        conn (psycopg2.extensions.connection, optional): Database connection object.
+            If None, a connection is borrowed from the pool.
+
+    Returns:
+        dict: {"rows": total rows committed, "batches": [{"rows": n, "seconds": t}, ...],
+            "seconds": total time}. If a batch fails it is rolled back, loading stops
+            and the dict also contains an "error" message; earlier batches stay committed.
+
+    Example:
+        result = bulk_insert("donante", donantes_df, batch_size=2000)
+        print(f"{result['rows']} rows in {result['seconds']:.1f}s")
+    """
+    if method not in ("copy", "values"):
+        raise ValueError("method must be 'copy' or 'values'.")
+    if conn is None:
+        try:
+            with pooled_connection() as pooled_conn:
+                return _bulk_insert(pooled_conn, table, rows, columns, batch_size, method)
+        except psycopg2.Error as e:
+            print(f"Error loading rows into {table}: {e}")
+            return {"rows": 0, "batches": [], "seconds": 0.0, "error": str(e)}
+    return _bulk_insert(conn, table, rows, columns, batch_size, method)
+
+
 def add_employee(nombre, dni, telefono, fecha_contratacion, salario):
     """
     Adds a new employee to the Empleado table.
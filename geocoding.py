@@ -0,0 +1,613 @@
+import bisect
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+# Load environment variables from .env file
+load_dotenv()
+
+GEOCODE_CACHE_PATH = os.environ.get(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "geocode.sqlite3"),
+)
+# Positive results are kept for 90 days, failed lookups for 1 day.
+GEOCODE_CACHE_TTL = float(os.environ.get("GEOCODE_CACHE_TTL", 90 * 24 * 3600))
+GEOCODE_NEGATIVE_TTL = float(os.environ.get("GEOCODE_NEGATIVE_TTL", 24 * 3600))
+
+OPENCAGE_API_KEY = os.environ.get("OPENCAGE_API_KEY")
+# Overridable so the client can be pointed at a local stub server
+OPENCAGE_URL = os.environ.get("OPENCAGE_URL", "https://api.opencagedata.com/geocode/v1/json")
+GEOCODE_TIMEOUT = float(os.environ.get("GEOCODE_TIMEOUT", 5))
+GEOCODE_MAX_RETRIES = int(os.environ.get("GEOCODE_MAX_RETRIES", 3))
+GEOCODE_BACKOFF = float(os.environ.get("GEOCODE_BACKOFF", 0.5))
+GEOCODE_MAX_WORKERS = int(os.environ.get("GEOCODE_MAX_WORKERS", 4))
+# Requests per second; the OpenCage free plan allows 1
+GEOCODE_RATE_LIMIT = float(os.environ.get("GEOCODE_RATE_LIMIT", 1))
+
+# Local street gazetteer used before falling back to OpenCage (empty to disable)
+GAZETTEER_PATH = os.environ.get(
+    "GEOCODE_GAZETTEER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer_caba.csv"),
+)
+# Minimum trigram similarity (Dice coefficient, 0-1) for a fuzzy street name match.
+# Kept high: a wrong match stores confident coordinates on the wrong street.
+GAZETTEER_MIN_SIMILARITY = float(os.environ.get("GEOCODE_GAZETTEER_MIN_SIMILARITY", 0.8))
+# How far (in house numbers) outside the known range of a street we still answer
+GAZETTEER_MAX_EXTRAPOLATION = int(os.environ.get("GEOCODE_GAZETTEER_MAX_EXTRAPOLATION", 200))
+
+
+class GeocodingError(Exception):
+    """
+    Raised when the geocoding service cannot be reached or answers with an error.
+    Addresses that simply have no match are not errors: they return (None, None).
+    """
+
+
+def normalize_address(address):
+    """
+    Normalizes an address so that trivially different spellings share a cache entry.
+
+    Lowercases, strips accents and punctuation and collapses whitespace, e.g.
+    "Av. Córdoba  2351, CABA" -> "av cordoba 2351 caba".
+    """
+    if not address:
+        return ""
+    text = unicodedata.normalize("NFKD", str(address))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class GeocodeCache:
+    """
+    Durable geocoding cache stored in a local SQLite file.
+
+    Entries are keyed by the normalized address and survive restarts. The file
+    is shared by every session and process running on the same host. Failed
+    lookups are stored as negative entries with a shorter TTL so that unknown
+    addresses are not requested again on every render.
+    """
+
+    def __init__(self, path=GEOCODE_CACHE_PATH, ttl=GEOCODE_CACHE_TTL, negative_ttl=GEOCODE_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocode (
+                address TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, address):
+        """
+        Looks up an address in the cache.
+
+        Args:
+            address (str): The address as entered by the user.
+
+        Returns:
+            tuple or None: (lat, lon) for a cached result, (None, None) for a
+                cached failed lookup, or None if the address is not cached.
+        """
+        key = normalize_address(address)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, expires_at FROM geocode WHERE address = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] < time.time():
+                self.misses += 1
+                return None
+            if row[0] is None or row[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return row[0], row[1]
+
+    def set(self, address, lat, lon):
+        """
+        Stores a geocoding result. Pass lat=None and lon=None to record a failed lookup.
+        """
+        key = normalize_address(address)
+        ttl = self.negative_ttl if lat is None or lon is None else self.ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (address, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                (key, lat, lon, time.time() + ttl),
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """
+        Deletes expired entries and returns how many were removed.
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM geocode WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """
+        Returns the hit/miss counters of this process and the number of stored entries.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "entries": entries,
+            }
+
+
+_cache_lock = threading.Lock()
+_geocode_cache = None
+
+
+def get_geocode_cache():
+    """
+    Returns the process-wide GeocodeCache, opening the SQLite file on first use.
+    """
+    global _geocode_cache
+    with _cache_lock:
+        if _geocode_cache is None:
+            _geocode_cache = GeocodeCache()
+        return _geocode_cache
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most `rate` of them start per second, across threads.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def defer(self, seconds):
+        """
+        Pushes every future call back by `seconds`, e.g. after a 429 Retry-After.
+        """
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+class Geocoder(ABC):
+    """
+    Common interface of the geocoding backends.
+
+    Subclasses implement geocode(); geocode_many() resolves one address after
+    the other unless the backend can do better.
+    """
+
+    @abstractmethod
+    def geocode(self, address):
+        """
+        Returns:
+            tuple: (lat, lon), or (None, None) if the address has no match.
+
+        Raises:
+            GeocodingError: If the backend fails.
+        """
+
+    def geocode_many(self, addresses):
+        """
+        Returns:
+            tuple: (results, errors) where results maps each address to (lat, lon)
+                or (None, None), and errors maps the addresses that failed to the
+                error message.
+        """
+        results, errors = {}, {}
+        for address in dict.fromkeys(addresses):
+            if not address:
+                continue
+            try:
+                results[address] = self.geocode(address)
+            except GeocodingError as e:
+                errors[address] = str(e)
+        return results, errors
+
+
+class OpenCageGeocoder(Geocoder):
+    """
+    Client for the OpenCage Geocoding API.
+
+    Reuses keep-alive connections through a requests.Session, applies a timeout
+    to every request, retries 429 and 5xx answers with exponential backoff
+    (honouring Retry-After) and respects a global rate limit. Results go through
+    the GeocodeCache, so an address is only requested once.
+    """
+
+    def __init__(self, api_key=OPENCAGE_API_KEY, url=OPENCAGE_URL, cache=None,
+                 timeout=GEOCODE_TIMEOUT, max_retries=GEOCODE_MAX_RETRIES, backoff=GEOCODE_BACKOFF,
+                 max_workers=GEOCODE_MAX_WORKERS, rate_limit=GEOCODE_RATE_LIMIT):
+        self.api_key = api_key
+        self.url = url
+        self.cache = cache if cache is not None else get_geocode_cache()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_limit)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _request(self, address):
+        params = {
+            "q": address,
+            "key": self.api_key,
+            "language": "es", # Idioma de los resultados
+            "no_annotations": 1, # No incluir metadatos extra para una respuesta más ligera
+        }
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_retries:
+                    raise GeocodingError(f"Error al conectar con la API de geocodificación: {e}") from e
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    raise GeocodingError(f"La API de geocodificación respondió {response.status_code} tras {attempt + 1} intentos.")
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * 2 ** attempt
+                self.rate_limiter.defer(delay)
+                continue
+
+            if response.status_code >= 400:
+                # 401/402/403: clave inválida o cuota agotada, reintentar no sirve
+                raise GeocodingError(f"La API de geocodificación respondió {response.status_code}: {response.text[:200]}")
+
+            try:
+                return response.json()
+            except ValueError as e:
+                raise GeocodingError("Respuesta de geocodificación inválida.") from e
+
+    def geocode(self, address):
+        """
+        Geocodes one address, going to the network only on a cache miss.
+
+        Returns:
+            tuple: (lat, lon), or (None, None) if the address has no match.
+
+        Raises:
+            GeocodingError: If the API key is missing or the service fails.
+        """
+        cached = self.cache.get(address)
+        if cached is not None:
+            return cached
+        if not self.api_key:
+            raise GeocodingError("La clave API de OpenCage no está configurada (OPENCAGE_API_KEY).")
+
+        data = self._request(address)
+        try:
+            results = data["results"]
+            if results:
+                lat = results[0]["geometry"]["lat"]
+                lon = results[0]["geometry"]["lng"]
+            else:
+                lat, lon = None, None
+        except (KeyError, IndexError, TypeError) as e:
+            raise GeocodingError(f"Formato inesperado en la respuesta de geocodificación para: {address}.") from e
+
+        self.cache.set(address, lat, lon) # (None, None) queda como caché negativa
+        return lat, lon
+
+    def geocode_many(self, addresses):
+        """
+        Geocodes several addresses in parallel with at most max_workers requests in flight.
+
+        Returns:
+            tuple: (results, errors) where results maps each address to (lat, lon)
+                or (None, None), and errors maps the addresses that failed to the
+                error message. No Streamlit calls are made from the worker threads.
+        """
+        unique = [address for address in dict.fromkeys(addresses) if address]
+        results, errors = {}, {}
+
+        def worker(address):
+            try:
+                results[address] = self.geocode(address)
+            except GeocodingError as e:
+                errors[address] = str(e)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(worker, unique))
+        return results, errors
+
+
+# Words that do not identify a street ("Av. Córdoba" and "Córdoba" are the same street)
+_STREET_PREFIXES = {
+    "av", "avda", "avenida", "calle", "pasaje", "pje", "boulevard", "bv", "bvd",
+    "teniente", "tte", "general", "gral", "presidente", "pte", "doctor", "dr",
+}
+# Street, house number (the last number) and whatever non-numeric text follows it
+_ADDRESS_RE = re.compile(r"^(?P<calle>.*\D)\s*(?P<altura>\d+)(?:\s+(?P<resto>\D*))?$")
+
+# Localities the CABA gazetteer can answer for: the city's own names and its barrios.
+# "Buenos Aires" alone is taken as the city, the way addresses in CABA are usually written.
+_CABA_LOCALITIES = {
+    "caba", "c a b a", "capital federal", "capital", "cap fed", "ciudad autonoma de buenos aires",
+    "ciudad de buenos aires", "buenos aires", "bs as", "bsas",
+    "agronomia", "almagro", "balvanera", "barracas", "belgrano", "boedo", "caballito",
+    "chacarita", "coghlan", "colegiales", "constitucion", "flores", "floresta", "la boca",
+    "boca", "la paternal", "paternal", "liniers", "mataderos", "monte castro", "monserrat",
+    "montserrat", "nueva pompeya", "pompeya", "nunez", "palermo", "parque avellaneda",
+    "parque chacabuco", "parque chas", "parque patricios", "puerto madero", "recoleta",
+    "retiro", "saavedra", "san cristobal", "san nicolas", "san telmo", "velez sarsfield",
+    "versalles", "villa crespo", "villa del parque", "villa devoto", "villa general mitre",
+    "villa lugano", "villa luro", "villa ortuzar", "villa pueyrredon", "villa real",
+    "villa riachuelo", "villa santa rita", "villa soldati", "villa urquiza",
+}
+# CABA postal codes: 1000-1499, optionally as CPA (C1425ABC)
+_CABA_POSTAL_RE = re.compile(r"^c?1[0-4]\d\d(?:[a-z]{3})?$")
+
+
+def _street_key(name):
+    words = normalize_address(name).split()
+    while len(words) > 1 and words[0] in _STREET_PREFIXES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def _is_generic_street(key):
+    # "calle", "calle 7", "7 n": no word that actually names a street
+    return not any(
+        len(word) >= 3 and word.isalpha() and word not in _STREET_PREFIXES
+        for word in key.split()
+    )
+
+
+def _is_caba_locality(text):
+    # True if text is only CABA locality names, CABA postal codes and "argentina",
+    # e.g. "palermo caba c1425abc argentina"
+    words = [word for word in text.split() if word != "argentina" and not _CABA_POSTAL_RE.match(word)]
+
+    def covered(start):
+        if start == len(words):
+            return True
+        return any(
+            " ".join(words[start:end]) in _CABA_LOCALITIES and covered(end)
+            for end in range(start + 1, len(words) + 1)
+        )
+    return covered(0)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GazetteerGeocoder(Geocoder):
+    """
+    Offline geocoder backed by a street gazetteer CSV with columns calle, altura, lat, lon.
+
+    Each street keeps its reference points sorted by house number and the
+    position of an address is interpolated between the two closest ones.
+    Street names are matched exactly first and then through a trigram index,
+    so "Av. Córdoba 2351" and "Cordoba 2351" both resolve, and so do small
+    misspellings of longer names. Lookups never touch the network.
+
+    The gazetteer only covers CABA: addresses that name another locality
+    (e.g. "Av. Santa Fe 1200, Rosario") and generic street names such as
+    "Calle 7" return (None, None), so a ChainGeocoder hands them to the next
+    backend.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH, min_similarity=GAZETTEER_MIN_SIMILARITY,
+                 max_extrapolation=GAZETTEER_MAX_EXTRAPOLATION):
+        self.path = path
+        self.min_similarity = min_similarity
+        self.max_extrapolation = max_extrapolation
+        self._streets = {} # calle normalizada -> (alturas, lats, lons)
+        self._trigram_index = {} # trigrama -> calles que lo contienen
+
+        points = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = _street_key(row["calle"])
+                points.setdefault(key, []).append(
+                    (int(row["altura"]), float(row["lat"]), float(row["lon"]))
+                )
+        for key, street_points in points.items():
+            street_points.sort()
+            self._streets[key] = tuple(list(column) for column in zip(*street_points))
+            for trigram in _trigrams(key):
+                self._trigram_index.setdefault(trigram, []).append(key)
+
+    def __len__(self):
+        return len(self._streets)
+
+    def match_street(self, name):
+        """
+        Returns the gazetteer street that best matches name, or None.
+        """
+        key = _street_key(name)
+        if key in self._streets:
+            return key
+        query = _trigrams(key)
+        shared = {}
+        for trigram in query:
+            for candidate in self._trigram_index.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = 2 * count / (len(query) + len(_trigrams(candidate))) # Coeficiente de Dice
+            if score > best_score:
+                best, best_score = candidate, score
+        return best if best_score >= self.min_similarity else None
+
+    def geocode(self, address):
+        # "Calle, altura[, localidad, ...]": everything after the street must be CABA
+        parts = [normalize_address(part) for part in str(address or "").split(",")]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None, None
+        match = _ADDRESS_RE.match(parts[0])
+        if not match:
+            return None, None
+        locality = " ".join([match.group("resto") or ""] + parts[1:]).strip()
+        if locality and not _is_caba_locality(locality):
+            return None, None
+        if _is_generic_street(_street_key(match.group("calle"))):
+            return None, None
+        street = self.match_street(match.group("calle"))
+        if street is None:
+            return None, None
+
+        alturas, lats, lons = self._streets[street]
+        altura = int(match.group("altura"))
+        if altura < alturas[0] - self.max_extrapolation or altura > alturas[-1] + self.max_extrapolation:
+            return None, None
+        if len(alturas) == 1:
+            return lats[0], lons[0]
+
+        # Interpolar entre los dos puntos de referencia más cercanos
+        i = min(max(bisect.bisect_left(alturas, altura), 1), len(alturas) - 1)
+        t = (altura - alturas[i - 1]) / (alturas[i] - alturas[i - 1])
+        t = min(max(t, 0.0), 1.0)
+        lat = lats[i - 1] + t * (lats[i] - lats[i - 1])
+        lon = lons[i - 1] + t * (lons[i] - lons[i - 1])
+        return round(lat, 6), round(lon, 6)
+
+
+class ChainGeocoder(Geocoder):
+    """
+    Tries each backend in order and keeps the first one that finds the address.
+
+    geocode_many() hands only the still unresolved addresses to the next
+    backend, so a fast local backend placed first saves most remote calls.
+    An error is only reported if no backend resolved the address.
+    """
+
+    def __init__(self, geocoders):
+        self.geocoders = list(geocoders)
+
+    def geocode(self, address):
+        last_error = None
+        for geocoder in self.geocoders:
+            try:
+                lat, lon = geocoder.geocode(address)
+            except GeocodingError as e:
+                last_error = e
+                continue
+            if lat is not None and lon is not None:
+                return lat, lon
+        if last_error is not None:
+            raise last_error
+        return None, None
+
+    def geocode_many(self, addresses):
+        pending = [address for address in dict.fromkeys(addresses) if address]
+        results, errors = {}, {}
+        for geocoder in self.geocoders:
+            if not pending:
+                break
+            found, failed = geocoder.geocode_many(pending)
+            results.update(found)
+            errors.update(failed)
+            pending = [address for address in pending if found.get(address, (None, None))[0] is None]
+        for address, coordinates in results.items():
+            if coordinates[0] is not None:
+                errors.pop(address, None)
+        return results, errors
+
+
+_geocoder_lock = threading.Lock()
+_opencage_geocoder = None
+_geocoder = None
+
+
+def get_opencage_geocoder():
+    """
+    Returns the process-wide OpenCageGeocoder, so its connection pool and rate
+    limit are shared by all sessions.
+    """
+    global _opencage_geocoder
+    with _geocoder_lock:
+        if _opencage_geocoder is None:
+            _opencage_geocoder = OpenCageGeocoder()
+        return _opencage_geocoder
+
+
+def get_geocoder():
+    """
+    Returns the process-wide geocoder used by the pages: the local gazetteer
+    (if its file exists) followed by OpenCage (if OPENCAGE_API_KEY is set).
+    """
+    global _geocoder, _opencage_geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            geocoders = []
+            if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+                try:
+                    geocoders.append(GazetteerGeocoder())
+                except (OSError, KeyError, ValueError) as e:
+                    print(f"Could not load the gazetteer {GAZETTEER_PATH}: {e}")
+            if OPENCAGE_API_KEY:
+                if _opencage_geocoder is None:
+                    _opencage_geocoder = OpenCageGeocoder()
+                geocoders.append(_opencage_geocoder)
+            _geocoder = ChainGeocoder(geocoders)
+        return _geocoder
+
+
+def geocode_columns(address):
+    """
+    Geocodes an address for storing it next to the address column of a row.
+
+    Errors are logged instead of raised: a row is still written when the
+    geocoder is unavailable, with NULL coordinates that backfill_coordinates.py
+    can fill in later.
+
+    Returns:
+        dict: {"lat": lat, "lon": lon}, with None values if the address could not be resolved.
+    """
+    if not address:
+        return {"lat": None, "lon": None}
+    try:
+        lat, lon = get_geocoder().geocode(address)
+    except GeocodingError as e:
+        print(f"Error geocoding {address!r}: {e}")
+        lat, lon = None, None
+    return {"lat": lat, "lon": lon}
@@ -0,0 +1,35 @@
+import os
+
+import streamlit as st
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Seconds between refreshes of the live sections of the pages (0 turns them off).
+# Each refresh reruns only that section's fragment and reads from the shared cache,
+# which database writes invalidate (see supabase_conn.py and functions.ChangeListener),
+# so an unchanged section costs no database query.
+LIVE_UPDATE_INTERVAL = float(os.environ.get("LIVE_UPDATE_INTERVAL", 10)) or None
+
+# Key in st.session_state with the ids each live section showed on its last run
+_SEEN_KEY = "_live_seen"
+
+
+def new_items(section, ids):
+    """
+    Returns the ids that were not in a live section the last time the current
+    session rendered it, so the section can announce what just appeared.
+
+    Args:
+        section (str): Name of the section, unique within the session.
+        ids (iterable): Ids of the items the section shows now.
+
+    Returns:
+        set: The new ids. Empty on the section's first render.
+    """
+    seen = st.session_state.setdefault(_SEEN_KEY, {})
+    ids = set(ids)
+    previous = seen.get(section)
+    seen[section] = ids
+    return set() if previous is None else ids - previous
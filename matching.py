@@ -0,0 +1,212 @@
+from datetime import date
+
+import numpy as np
+
+from spatial import haversine_km
+
+# --- Mapa de compatibilidad de sangre (DONANTE A RECEPTOR) ---
+# Este diccionario indica a qué tipos de sangre puede donar cada grupo.
+# Por ejemplo, 'O-' puede donar a todos, mientras que 'AB+' solo a 'AB+'.
+BLOOD_COMPATIBILITY_MAP = {
+    "O-": ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"], # Donante Universal
+    "O+": ["A+", "B+", "AB+", "O+"],
+    "A-": ["A+", "A-", "AB+", "AB-"],
+    "A+": ["A+", "AB+"],
+    "B-": ["B+", "B-", "AB+", "AB-"],
+    "B+": ["B+", "AB+"],
+    "AB-": ["AB+", "AB-"],
+    "AB+": ["AB+"]
+}
+
+# Blood types as small integer codes for the columnar donor arrays
+BLOOD_TYPES = list(BLOOD_COMPATIBILITY_MAP)
+BLOOD_TYPE_CODES = {blood_type: code for code, blood_type in enumerate(BLOOD_TYPES)}
+UNKNOWN_BLOOD_TYPE = -1
+
+# Inverse of BLOOD_COMPATIBILITY_MAP (recipient -> donors): who can give to each type
+COMPATIBLE_DONORS = {
+    recipient: [donor for donor, recipients in BLOOD_COMPATIBILITY_MAP.items() if recipient in recipients]
+    for recipient in BLOOD_TYPES
+}
+
+# Donor age limits (see the Requisitos tab of the donor page)
+DONOR_MIN_AGE = 18
+DONOR_MAX_AGE = 65
+
+# Compatibility component of the score: an exact blood type match is preferred
+# over a merely compatible one, so scarce types (e.g. O-) go where they are needed.
+COMPATIBILITY_EXACT = 1.0
+COMPATIBILITY_COMPATIBLE = 0.7
+# Campaigns without a beneficiary accept any blood type
+COMPATIBILITY_ANY = 0.5
+
+# Distance at which the distance component drops to 1/e, and days to fecha_fin
+# at which the urgency component halves.
+DISTANCE_SCALE_KM = 10.0
+URGENCY_SCALE_DAYS = 7.0
+
+DEFAULT_WEIGHTS = {"distance": 0.5, "urgency": 0.3, "compatibility": 0.2}
+
+
+def rank_campaigns(campaigns, donor_type, lat=None, lon=None, radius_km=None, today=None, weights=None):
+    """
+    Ranks the campaigns a donor can help by distance, urgency and compatibility.
+
+    Every component is computed over all candidates at once with NumPy:
+    distance decays exponentially with the haversine distance to the campaign's
+    hospital, urgency decays with the days left until fecha_fin, and
+    compatibility rewards exact blood type matches. Campaigns the donor is not
+    compatible with are dropped.
+
+    Args:
+        campaigns (list of dict): Rows with "fecha_fin" (ISO date), "tipo_sangre_beneficiario"
+            (None for campaigns without a beneficiary) and the hospital's "lat"/"lon".
+        donor_type (str): The donor's blood type, a key of BLOOD_COMPATIBILITY_MAP.
+        lat (float, optional): Donor latitude. Without a location the distance
+            component is 0 for every campaign and radius_km is ignored.
+        lon (float, optional): Donor longitude.
+        radius_km (float, optional): Drop campaigns farther than this, or whose
+            hospital has no coordinates.
+        today (datetime.date, optional): Reference date for urgency. Default is today.
+        weights (dict, optional): Weights for "distance", "urgency" and "compatibility".
+            Default is DEFAULT_WEIGHTS.
+
+    Returns:
+        list of tuple: (campaign, score, distance_km) sorted by descending score;
+            distance_km is None when it cannot be computed.
+    """
+    if not campaigns or donor_type not in BLOOD_COMPATIBILITY_MAP:
+        return []
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    today = today or date.today()
+    compatible_with = BLOOD_COMPATIBILITY_MAP[donor_type]
+
+    recipient_types = [campaign.get("tipo_sangre_beneficiario") for campaign in campaigns]
+    compatibility = np.array([
+        COMPATIBILITY_ANY if recipient is None
+        else COMPATIBILITY_EXACT if recipient == donor_type
+        else COMPATIBILITY_COMPATIBLE if recipient in compatible_with
+        else np.nan
+        for recipient in recipient_types
+    ], dtype=np.float64)
+
+    days_left = np.array([
+        (date.fromisoformat(str(campaign["fecha_fin"])[:10]) - today).days
+        if campaign.get("fecha_fin") else np.nan
+        for campaign in campaigns
+    ], dtype=np.float64)
+    urgency = np.where(np.isnan(days_left), 0.0, 1.0 / (1.0 + np.clip(days_left, 0, None) / URGENCY_SCALE_DAYS))
+
+    keep = ~np.isnan(compatibility)
+    if lat is not None and lon is not None:
+        lats = np.array([campaign.get("lat") if campaign.get("lat") is not None else np.nan for campaign in campaigns], dtype=np.float64)
+        lons = np.array([campaign.get("lon") if campaign.get("lon") is not None else np.nan for campaign in campaigns], dtype=np.float64)
+        distances = haversine_km(lat, lon, lats, lons)
+        closeness = np.where(np.isnan(distances), 0.0, np.exp(-distances / DISTANCE_SCALE_KM))
+        if radius_km is not None:
+            keep &= distances <= radius_km # NaN (no coordinates) compares False and is dropped too
+    else:
+        distances = np.full(len(campaigns), np.nan)
+        closeness = np.zeros(len(campaigns))
+
+    scores = (
+        weights["distance"] * closeness
+        + weights["urgency"] * urgency
+        + weights["compatibility"] * np.nan_to_num(compatibility)
+    )
+    order = np.flatnonzero(keep)
+    order = order[np.argsort(-scores[order], kind="stable")]
+    return [
+        (campaigns[i], float(scores[i]), None if np.isnan(distances[i]) else float(distances[i]))
+        for i in order
+    ]
+
+
+def _float_column(rows, key):
+    return np.array([row.get(key) if row.get(key) is not None else np.nan for row in rows], dtype=np.float64)
+
+
+class DonorMatcher:
+    """
+    Finds and ranks the donors who can give blood for a campaign.
+
+    Donors are stored column by column in NumPy arrays (blood type codes, age,
+    eligibility and coordinates) and indexed by blood type, so a query only
+    touches the rows of the donor types COMPATIBLE_DONORS allows for the
+    recipient and filters them with vectorized comparisons.
+
+    Example:
+        matcher = DonorMatcher(donantes)
+        for donante, km in matcher.match("A+", lat=-34.60, lon=-58.40, max_km=20):
+            print(donante["nombred"], km)
+    """
+
+    def __init__(self, donors):
+        self.donors = list(donors)
+        self.blood_types = np.array(
+            [BLOOD_TYPE_CODES.get(donor.get("tipo_de_sangre"), UNKNOWN_BLOOD_TYPE) for donor in self.donors],
+            dtype=np.int8,
+        )
+        self.ages = _float_column(self.donors, "edad")
+        self.eligible = np.array([bool(donor.get("cumple_requisitos")) for donor in self.donors], dtype=bool)
+        self.lats = _float_column(self.donors, "lat")
+        self.lons = _float_column(self.donors, "lon")
+        # Inverted index: blood type code -> rows of the donors with that type
+        self._rows_by_type = {code: np.flatnonzero(self.blood_types == code) for code in range(len(BLOOD_TYPES))}
+
+    def __len__(self):
+        return len(self.donors)
+
+    def candidate_rows(self, recipient_type):
+        """
+        Returns the rows of every donor whose blood type can give to recipient_type.
+        A recipient_type of None (a campaign without a beneficiary) accepts all known types.
+        """
+        donor_types = COMPATIBLE_DONORS.get(recipient_type, []) if recipient_type is not None else BLOOD_TYPES
+        rows = [self._rows_by_type[BLOOD_TYPE_CODES[donor_type]] for donor_type in donor_types]
+        return np.sort(np.concatenate(rows)) if rows else np.array([], dtype=np.int64)
+
+    def match(self, recipient_type, lat=None, lon=None, max_km=None, min_age=DONOR_MIN_AGE,
+              max_age=DONOR_MAX_AGE, only_eligible=True, limit=50):
+        """
+        Returns the compatible donors for a recipient, closest first.
+
+        Args:
+            recipient_type (str or None): The beneficiary's blood type, or None for
+                campaigns that accept any type.
+            lat (float, optional): Latitude of the campaign's hospital.
+            lon (float, optional): Longitude of the campaign's hospital. Without a
+                location, max_km is ignored and donors are not ranked by distance.
+            max_km (float, optional): Drop donors farther than this or without coordinates.
+            min_age (int, optional): Minimum donor age. Default is DONOR_MIN_AGE.
+            max_age (int, optional): Maximum donor age. Default is DONOR_MAX_AGE.
+            only_eligible (bool, optional): Keep only donors with cumple_requisitos. Default is True.
+            limit (int, optional): Maximum number of donors to return. Default is 50.
+
+        Returns:
+            list of tuple: (donor, distance_km) pairs. Exact blood type matches come
+                before other compatible types at the same distance; distance_km is
+                None when it cannot be computed.
+        """
+        rows = self.candidate_rows(recipient_type)
+        ages = self.ages[rows]
+        keep = (ages >= min_age) & (ages <= max_age) # NaN (unknown age) compares False and is dropped
+        if only_eligible:
+            keep &= self.eligible[rows]
+        rows = rows[keep]
+
+        if lat is not None and lon is not None:
+            distances = haversine_km(lat, lon, self.lats[rows], self.lons[rows])
+            if max_km is not None:
+                within = distances <= max_km
+                rows, distances = rows[within], distances[within]
+        else:
+            distances = np.full(len(rows), np.nan)
+
+        exact = self.blood_types[rows] == BLOOD_TYPE_CODES.get(recipient_type, UNKNOWN_BLOOD_TYPE)
+        # Donors without coordinates sort last
+        order = np.lexsort((~exact, np.where(np.isnan(distances), np.inf, distances)))[:limit]
+        return [
+            (self.donors[rows[i]], None if np.isnan(distances[i]) else float(distances[i]))
+            for i in order
+        ]
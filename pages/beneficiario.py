@@ -1,8 +1,10 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import time
+from supabase import Client
+from supabase_conn import get_supabase_client
+from cache import session_get, session_set, session_invalidate, shared_get # Cachés por sesión y compartida
+from ui import flash, show_flashes # Mensajes de confirmación que sobreviven a st.rerun()
 from datetime import date
 
 # --- Configuración de la página de Streamlit ---
@@ -22,7 +24,7 @@ supabase_client: Client = None
 
 if SUPABASE_URL and SUPABASE_KEY:
     try:
-        supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase_client = get_supabase_client()
     except Exception as e:
         st.error(f"Error al inicializar cliente Supabase: {e}")
 else:
@@ -179,6 +181,19 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# El perfil se guarda en la caché de la sesión y solo se vuelve a consultar
+# después de actualizarlo en perfil_beneficiario_tab().
+def obtener_datos_beneficiario(beneficiario_id):
+    perfil_en_cache = session_get(("beneficiario", beneficiario_id))
+    if perfil_en_cache is not None:
+        return perfil_en_cache
+    response = supabase_client.table("beneficiario").select("*").eq("id_beneficiario", beneficiario_id).limit(1).execute()
+    if response.data:
+        session_set(("beneficiario", beneficiario_id), response.data[0])
+        return response.data[0]
+    return None
+
+
 def perfil_beneficiario_tab():
     st.markdown("## Datos de mi Perfil")
     st.markdown("---")
@@ -191,11 +206,10 @@ def perfil_beneficiario_tab():
         return
 
     try:
-        # Obtener los datos del beneficiario de Supabase
-        response = supabase_client.table("beneficiario").select("*").eq("id_beneficiario", user_db_id).limit(1).execute()
+        # Obtener los datos del beneficiario (desde la caché de la sesión o Supabase)
+        beneficiario_data = obtener_datos_beneficiario(user_db_id)
 
-        if response.data:
-            beneficiario_data = response.data[0]
+        if beneficiario_data:
 
             # Formulario para mostrar y modificar el perfil
             with st.form("perfil_form", clear_on_submit=False):
@@ -226,9 +240,8 @@ def perfil_beneficiario_tab():
                     update_response = supabase_client.table("beneficiario").update(update_data).eq("id_beneficiario", user_db_id).execute()
 
                     if update_response.data:
-                        st.success("¡Perfil actualizado con éxito!")
-                        st.balloons()
-                        time.sleep(1)
+                        session_invalidate(("beneficiario", user_db_id)) # El perfil en caché quedó desactualizado
+                        flash("¡Perfil actualizado con éxito!", balloons=True)
                         st.rerun()
                     else:
                         st.error(f"Error al actualizar el perfil: {update_response.error.message}")
@@ -246,15 +259,18 @@ def perfil_beneficiario_tab():
         st.warning("Asegúrate de que la conexión a Supabase esté activa y las RLS permitan la lectura/escritura de tu perfil.")
 
 # Nueva función para obtener la lista de hospitales
+# Compartida entre sesiones (cache.shared_get): se consulta una vez cada 5 minutos y,
+# pasado ese tiempo, se sigue mostrando la lista anterior mientras se refresca.
+def _consultar_hospitales():
+    response = supabase_client.table("hospital").select("id_hospital, nombre_hospital").order("nombre_hospital").execute()
+    return response.data or []
+
+
 def obtener_hospitales():
     if supabase_client is None:
         return []
     try:
-        response = supabase_client.table("hospital").select("id_hospital, nombre_hospital").order("nombre_hospital").execute()
-        if response.data:
-            return response.data
-        else:
-            return []
+        return shared_get(("hospitales", "beneficiario"), _consultar_hospitales, ttl=300, stale_ttl=600, tags=("hospital",))
     except Exception as e:
         st.error(f"Error al obtener la lista de hospitales: {e}")
         return []
@@ -293,9 +309,9 @@ def crear_campana_tab():
         selected_hospital_id = hospital_options.get(selected_hospital_name)
         
         try:
-            beneficiario_response = supabase_client.table("beneficiario").select("tipo_de_sangre").eq("id_beneficiario", user_db_id).limit(1).execute()
-            if beneficiario_response.data:
-                tipo_sangre_beneficiario = beneficiario_response.data[0]['tipo_de_sangre']
+            beneficiario_data = obtener_datos_beneficiario(user_db_id)
+            if beneficiario_data:
+                tipo_sangre_beneficiario = beneficiario_data['tipo_de_sangre']
                 st.info(f"Tu tipo de sangre registrado es: **{tipo_sangre_beneficiario}**. Esto se asociará a la campaña.")
             else:
                 st.warning("No se pudo obtener tu tipo de sangre registrado.")
@@ -328,9 +344,7 @@ def crear_campana_tab():
                     insert_response = supabase_client.table("campana").insert(data_to_insert).execute()
 
                     if insert_response.data:
-                        st.success(f"¡Solicitud de campaña '{nombre_campana}' enviada! Está **pendiente de aprobación** por el hospital.")
-                        st.balloons()
-                        time.sleep(2) # Dar tiempo para leer el mensaje
+                        flash(f"¡Solicitud de campaña '{nombre_campana}' enviada! Está **pendiente de aprobación** por el hospital.", balloons=True)
                         st.rerun()
                     else:
                         st.error(f"Error al crear la campaña: {insert_response.error.message}")
@@ -355,12 +369,17 @@ def mis_campanas_tab():
     hospital_names_map = {h['id_hospital']: h['nombre_hospital'] for h in hospitales_data}
 
     try:
-        campanas_response = supabase_client.table("campana").select("*").eq("id_beneficiario", user_db_id).order("fecha_fin", desc=False).execute()
+        # Compartida entre reruns; se descarta sola al escribir en la tabla campana
+        campanas_beneficiario = shared_get(
+            ("campanas_beneficiario", user_db_id),
+            lambda: supabase_client.table("campana").select("*").eq("id_beneficiario", user_db_id).order("fecha_fin", desc=False).execute().data or [],
+            tags=("campana",),
+        )
 
-        if campanas_response.data:
+        if campanas_beneficiario:
             st.subheader("Campañas Pendientes de Aprobación / En Curso:")
             found_active_or_pending = False
-            for campana in campanas_response.data:
+            for campana in campanas_beneficiario:
                 # Asegurarse de que los valores de estado son strings antes de llamar a .lower()
                 estado_aprobacion = campana.get('estado_aprobacion_hospital')
                 if estado_aprobacion is None:
@@ -395,8 +414,7 @@ def mis_campanas_tab():
                                 try:
                                     update_response = supabase_client.table("campana").update({"estado_campana": "Finalizada"}).eq("id_campana", campana['id_campana']).execute()
                                     if update_response.data:
-                                        st.success(f"Campaña '{campana.get('nombre_campana', '')}' finalizada con éxito.")
-                                        time.sleep(1)
+                                        flash(f"Campaña '{campana.get('nombre_campana', '')}' finalizada con éxito.")
                                         st.rerun()
                                     else:
                                         st.error(f"Error al finalizar la campaña: {update_response.error.message}")
@@ -417,7 +435,7 @@ def mis_campanas_tab():
 
             st.subheader("Campañas Finalizadas / Rechazadas:")
             found_finished_or_rejected = False
-            for campana in campanas_response.data:
+            for campana in campanas_beneficiario:
                 # Asegurarse de que los valores de estado son strings antes de llamar a .lower()
                 estado_aprobacion = campana.get('estado_aprobacion_hospital')
                 if estado_aprobacion is None:
@@ -474,6 +492,7 @@ def beneficiario_perfil_page():
     st.markdown(f"<h1 style='color: var(--primary-red);'>👤 Panel de Beneficiario</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; font-size: 1.2em; color: var(--dark-grey-text);'>Gestiona tu perfil y campañas de donación.</p>", unsafe_allow_html=True)
     st.markdown("---")
+    show_flashes()
 
     # Mover el botón de cerrar sesión a la barra lateral si está logueado
     if st.session_state['logged_in']:
@@ -481,14 +500,18 @@ def beneficiario_perfil_page():
         st.sidebar.success(f"Sesión iniciada como: **{st.session_state['user_type']}**")
 
 
-    tab1, tab2, tab3 = st.tabs(["Mi Perfil", "Crear Campaña", "Mis Campañas"])
+    # Con on_change="rerun" solo se ejecuta la pestaña abierta, las demás no consultan la base de datos.
+    tab1, tab2, tab3 = st.tabs(["Mi Perfil", "Crear Campaña", "Mis Campañas"], key="beneficiario_tabs", on_change="rerun")
 
-    with tab1:
-        perfil_beneficiario_tab()
-    with tab2:
-        crear_campana_tab()
-    with tab3:
-        mis_campanas_tab()
+    if tab1.open:
+        with tab1:
+            perfil_beneficiario_tab()
+    if tab2.open:
+        with tab2:
+            crear_campana_tab()
+    if tab3.open:
+        with tab3:
+            mis_campanas_tab()
 
 if __name__ == "__main__":
     beneficiario_perfil_page()
@@ -1,13 +1,19 @@
 import streamlit as st
 import pandas as pd
-import time
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from supabase_conn import get_supabase_client
 from datetime import datetime
 import folium # Importar Folium para mapas
 from streamlit_folium import st_folium # Importar para mostrar mapas en Streamlit
-import requests # Importar para hacer peticiones HTTP a la API de geocodificación
+from geocoding import get_geocoder, geocode_columns, GeocodingError # Geocodificación: nomenclador local y OpenCage como respaldo
+from spatial import GridIndex # Índice espacial para buscar los hospitales más cercanos
+from matching import BLOOD_COMPATIBILITY_MAP, rank_campaigns # Compatibilidad de sangre y ranking de campañas
+from campaign_feed import get_campaign_feed # Campañas compatibles por tipo de sangre, compartidas entre sesiones
+from cache import session_get, session_set, session_invalidate, shared_get # Cachés por sesión y compartida
+from ui import flash, show_flashes # Mensajes de confirmación que sobreviven a st.rerun()
+from live_updates import LIVE_UPDATE_INTERVAL, new_items # Secciones que se actualizan solas
 
 
 # --- Configuración de la página de Streamlit ---
@@ -26,8 +32,6 @@ load_dotenv()
 # --- Configuración de Supabase ---
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-# Nueva variable para la clave API de OpenCage
-OPENCAGE_API_KEY = os.environ.get("OPENCAGE_API_KEY")
 
 
 supabase_client: Client = None
@@ -38,7 +42,7 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     st.info("Por favor, configúralas para que la conexión a la base de datos funcione.")
 else:
     try:
-        supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase_client = get_supabase_client()
     except Exception as e:
         st.error(f"Error al inicializar cliente Supabase: {e}")
         supabase_client = None
@@ -207,29 +211,24 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# --- Mapa de compatibilidad de sangre (DONANTE A RECEPTOR) ---
-# Este diccionario indica a qué tipos de sangre puede donar cada grupo.
-# Por ejemplo, 'O-' puede donar a todos, mientras que 'AB+' solo a 'AB+'.
-BLOOD_COMPATIBILITY_MAP = {
-    "O-": ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"], # Donante Universal
-    "O+": ["A+", "B+", "AB+", "O+"],
-    "A-": ["A+", "A-", "AB+", "AB-"],
-    "A+": ["A+", "AB+"],
-    "B-": ["B+", "B-", "AB+", "AB-"],
-    "B+": ["B+", "AB+"],
-    "AB-": ["AB+", "AB-"],
-    "AB+": ["AB+"]
-}
+# Cantidad de tarjetas de campañas que se muestran por vez
+CAMPANAS_POR_PAGINA = 20
 
 
 # --- Función para obtener datos del donante ---
+# El perfil se guarda en la caché de la sesión y solo se vuelve a consultar
+# después de actualizar_datos_donante().
 def obtener_datos_donante(donante_email):
+    perfil_en_cache = session_get(("donante", donante_email))
+    if perfil_en_cache is not None:
+        return perfil_en_cache
     if supabase_client is None:
         st.error("Conexión a Supabase no disponible. No se pueden obtener datos del donante.")
         return None
     try:
         response = supabase_client.table("donante").select("*, id_donante, tipo_de_sangre").eq("mail", donante_email).execute()
         if response.data:
+            session_set(("donante", donante_email), response.data[0])
             return response.data[0]
         else:
             return None
@@ -244,10 +243,16 @@ def actualizar_datos_donante(donante_email, datos):
         st.error("Conexión a Supabase no disponible. No se pueden actualizar datos del donante.")
         return False
     try:
+        # Geocodificar solo si la dirección cambió (o todavía no tiene coordenadas)
+        perfil_actual = obtener_datos_donante(donante_email) or {}
+        if "direccion" in datos and (
+            datos["direccion"] != perfil_actual.get("direccion") or perfil_actual.get("lat") is None
+        ):
+            datos = {**datos, **geocode_columns(datos["direccion"])}
         response = supabase_client.table("donante").update(datos).eq("mail", donante_email).execute()
         if response.data:
-            st.success("✅ ¡Perfil actualizado con éxito!")
-            time.sleep(1)
+            session_invalidate(("donante", donante_email)) # El perfil en caché quedó desactualizado
+            flash("✅ ¡Perfil actualizado con éxito!")
             st.rerun()
             return True
         else:
@@ -258,59 +263,59 @@ def actualizar_datos_donante(donante_email, datos):
         return False
 
 
-# --- Función para obtener el tipo de sangre de un beneficiario ---
-def obtener_tipo_sangre_beneficiario(beneficiario_id):
-    if supabase_client is None:
-        return None
-    try:
-        response = supabase_client.table("beneficiario").select("tipo_de_sangre").eq("id_beneficiario", beneficiario_id).limit(1).execute()
-        if response.data and response.data[0]['tipo_de_sangre']:
-            return response.data[0]['tipo_de_sangre']
-        else:
-            return None
-    except Exception as e:
-        st.warning(f"No se pudo obtener el tipo de sangre del beneficiario {beneficiario_id}: {e}")
-        return None
+# --- Funciones de Campañas ---
+# Las lecturas más consultadas pasan por la caché compartida del proceso (cache.shared_get):
+# si cientos de sesiones piden lo mismo a la vez, se hace una sola consulta a Supabase.
+# Cada lectura se etiqueta con las tablas de las que depende y se descarta sola cuando
+# la app escribe en alguna de ellas (ver supabase_conn._invalidate_on_write).
+CAMPANAS_TTL = 30 # Sin servir datos vencidos: el feed compartido ya las guarda en memoria
+HOSPITALES_TTL = 300
+HOSPITALES_STALE_TTL = 600 # Mientras tanto se sirve la lista anterior y se refresca en segundo plano
+
+
+def _consultar_campanas_activas(hoy):
+    # Solo se traen las campañas vigentes: en curso, aprobadas por el hospital y con
+    # fecha de fin no vencida. El filtro lo resuelve la base de datos (ver
+    # sql/001_campanas_activas.sql), así el payload no crece con el histórico.
+    # El tipo de sangre del beneficiario se trae embebido en la misma consulta
+    # (relación campana.id_beneficiario -> beneficiario) para evitar una consulta por campaña,
+    # y lo mismo las coordenadas del hospital, que se usan para ordenar por distancia.
+    response = (
+        supabase_client.table("campana")
+        .select("id_campana, nombre_campana, fecha_inicio, fecha_fin, id_hospital, id_beneficiario, descripcion, estado_campana, estado_aprobacion_hospital, beneficiario(tipo_de_sangre), hospital(nombre_hospital, lat, lon)")
+        .eq("estado_campana", "En Curso")
+        .eq("estado_aprobacion_hospital", "Aprobada")
+        .gte("fecha_fin", hoy.isoformat())
+        .order("fecha_fin", desc=False)
+        .execute()
+    )
+
+    campanas_filtradas = []
+    for c in response.data or []:
+        # Aplanar el beneficiario embebido: None si la campaña no tiene beneficiario
+        beneficiario = c.pop('beneficiario', None) or {}
+        c['tipo_sangre_beneficiario'] = beneficiario.get('tipo_de_sangre')
+        hospital = c.pop('hospital', None) or {}
+        c['nombre_hospital'] = hospital.get('nombre_hospital')
+        c['lat'] = hospital.get('lat')
+        c['lon'] = hospital.get('lon')
+        campanas_filtradas.append(c)
+    return campanas_filtradas
 
 
-# --- Funciones de Campañas ---
 def obtener_campanas_activas():
     if supabase_client:
         try:
-            # Obtener todas las campañas, incluyendo 'id_beneficiario' para la compatibilidad
-            # y 'estado_aprobacion_hospital' para filtrar
-            response = supabase_client.table("campana").select("id_campana, nombre_campana, fecha_inicio, fecha_fin, id_hospital, id_beneficiario, descripcion, estado_campana, estado_aprobacion_hospital").order("fecha_fin", desc=False).execute()
-            
-            if response.data:
-                hoy = datetime.now().date()
-                campanas_filtradas = []
-                for c in response.data:
-                    # Asegurarse de que los valores existen y son strings antes de llamar a .lower()
-                    estado_campana_str = c.get('estado_campana')
-                    estado_aprobacion_hospital_str = c.get('estado_aprobacion_hospital')
-                    fecha_fin_str = c.get('fecha_fin')
-
-                    is_en_curso = isinstance(estado_campana_str, str) and estado_campana_str.lower() == 'en curso'
-                    is_aprobada = isinstance(estado_aprobacion_hospital_str, str) and estado_aprobacion_hospital_str.lower() == 'aprobada'
-                    
-                    is_valid_date = False
-                    if isinstance(fecha_fin_str, str):
-                        try:
-                            fecha_fin_date = datetime.strptime(fecha_fin_str, "%Y-%m-%d").date()
-                            is_valid_date = fecha_fin_date >= hoy
-                        except ValueError:
-                            # st.warning(f"Fecha de fin inválida para campaña {c.get('id_campana')}: {fecha_fin_str}")
-                            is_valid_date = False
-
-                    if is_en_curso and is_aprobada and is_valid_date:
-                        campanas_filtradas.append(c)
-                return campanas_filtradas
-            else:
-                return []
+            hoy = datetime.now().date()
+            return shared_get(
+                ("campanas_activas", hoy.isoformat()),
+                lambda: _consultar_campanas_activas(hoy),
+                ttl=CAMPANAS_TTL, tags=("campana", "beneficiario", "hospital"),
+            )
         except Exception as e:
             st.error(f"❌ Error al obtener campañas desde Supabase: {e}")
-            return []
-    return []
+            return None # None (y no []) para que el feed compartido no guarde el error
+    return None
 
 
 def inscribirse_campana(campana_id: int, donante_id: int):
@@ -339,54 +344,62 @@ def inscribirse_campana(campana_id: int, donante_id: int):
 
 
 # --- Función para obtener datos de hospitales ---
+def _consultar_hospitales():
+    # Las coordenadas se calculan al guardar la dirección (ver sql/005_coordenadas_hospital.sql)
+    response = supabase_client.table("hospital").select("nombre_hospital, direccion, telefono, lat, lon").execute()
+    return response.data or []
+
+
 def obtener_hospitales():
     if supabase_client is None:
         st.error("Conexión a Supabase no disponible. No se pueden obtener datos de hospitales.")
         return []
     try:
-        response = supabase_client.table("hospital").select("nombre_hospital, direccion, telefono").execute()
-        if response.data:
-            return response.data
-        else:
-            return []
+        return shared_get(
+            ("hospitales", "donante"), _consultar_hospitales,
+            ttl=HOSPITALES_TTL, stale_ttl=HOSPITALES_STALE_TTL, tags=("hospital",),
+        )
     except Exception as e:
         st.error(f"Error al obtener datos de hospitales: {e}")
         return []
 
 
-# --- Función para geocodificar una dirección usando OpenCage Geocoding API ---
+# --- Función para geocodificar una dirección (nomenclador local, con OpenCage como respaldo) ---
 def geocode_address(address: str):
-    if not OPENCAGE_API_KEY:
-        st.error("❌ Error: La clave API de OpenCage no está configurada. Por favor, añádela como variable de entorno 'OPENCAGE_API_KEY'.")
-        return None, None
-    
-    base_url = "https://api.opencagedata.com/geocode/v1/json"
-    params = {
-        "q": address,
-        "key": OPENCAGE_API_KEY,
-        "language": "es", # Idioma de los resultados
-        "no_annotations": 1 # No incluir metadatos extra para una respuesta más ligera
-    }
-    
+    # El nomenclador local responde sin red; OpenCage solo se consulta si la calle no figura en él
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status() # Lanza una excepción para errores HTTP (4xx o 5xx)
-        data = response.json()
-        
-        if data and data['results']:
-            # Tomamos el primer resultado
-            lat = data['results'][0]['geometry']['lat']
-            lon = data['results'][0]['geometry']['lng']
-            return lat, lon
-        else:
-            st.warning(f"⚠️ No se encontraron coordenadas para la dirección: {address}")
-            return None, None
-    except requests.exceptions.RequestException as e:
-        st.error(f"❌ Error al conectar con la API de geocodificación: {e}")
-        return None, None
-    except KeyError:
-        st.error(f"❌ Error al parsear la respuesta de geocodificación para: {address}. Formato inesperado.")
+        lat, lon = get_geocoder().geocode(address)
+    except GeocodingError as e:
+        st.error(f"❌ {e}")
         return None, None
+    if lat is None or lon is None:
+        st.warning(f"⚠️ No se encontraron coordenadas para la dirección: {address}")
+    return lat, lon
+
+
+# --- Ubicación del donante e índice espacial de hospitales ---
+# Se usan las coordenadas guardadas con el perfil (ver sql/006_coordenadas_donante.sql);
+# si todavía no las tiene, la dirección se geocodifica una sola vez por sesión.
+def obtener_ubicacion_donante(donante_data):
+    if donante_data.get('lat') is not None and donante_data.get('lon') is not None:
+        return donante_data['lat'], donante_data['lon']
+    direccion = donante_data.get('direccion')
+    ubicacion = session_get(("ubicacion_donante", direccion))
+    if ubicacion is None:
+        ubicacion = geocode_address(direccion)
+        session_set(("ubicacion_donante", direccion), ubicacion)
+    return ubicacion
+
+
+# El índice se arma una vez por sesión y se vuelve a armar solo si cambian los hospitales o sus coordenadas.
+def obtener_indice_hospitales(hospitales):
+    firma = hash(tuple((h.get('nombre_hospital'), h.get('lat'), h.get('lon')) for h in hospitales))
+    en_cache = session_get("indice_hospitales")
+    if en_cache is not None and en_cache[0] == firma:
+        return en_cache[1]
+    indice = GridIndex(hospitales)
+    session_set("indice_hospitales", (firma, indice))
+    return indice
 
 
 # --- Definición de las funciones de sección ---
@@ -492,6 +505,42 @@ def donante_perfil():
                 st.info("Por favor, ve a la página principal para 'Crear una Cuenta Nueva' como Donante si aún no tienes una, o 'Inicia Sesión' si ya la tienes y quieres actualizar tu perfil.")
 
 
+# Cada tarjeta es un fragmento: al inscribirse solo se vuelve a ejecutar la tarjeta,
+# no toda la página (no se vuelven a consultar las campañas ni a armar el mapa).
+@st.fragment
+def tarjeta_campana(campana, donante_id_logueado, distancia_km=None):
+    with st.container(border=True): # Use st.container with border for each campaign
+        campana_nombre = campana.get('nombre_campana', 'Sin Nombre')
+        beneficiario_id = campana.get('id_beneficiario')
+        tipo_sangre_beneficiario = campana.get('tipo_sangre_beneficiario') or "N/A" # Viene embebido desde obtener_campanas_activas()
+
+
+        campana_id = campana.get('id_campana')
+
+
+        st.markdown(f"### Campaña: {campana_nombre}")
+        if beneficiario_id: # Mostrar tipo de sangre requerido solo si es de un beneficiario
+            st.write(f"**Tipo de Sangre Compatible con:** **{tipo_sangre_beneficiario}**") # CAMBIO AQUÍ
+        else:
+            st.write(f"**Tipo de Sangre Compatible con:** **Cualquiera** (Campaña solidaria del hospital)") # Mensaje para campañas sin beneficiario
+        
+        st.write(f"**Descripción:** {campana.get('descripcion', 'N/A')}")
+        if campana.get('nombre_hospital'):
+            distancia = f" (a {distancia_km:.1f} km)" if distancia_km is not None else ""
+            st.write(f"**Hospital:** {campana['nombre_hospital']}{distancia}")
+        st.write(f"**Fecha Límite:** {campana.get('fecha_fin', 'N/A')}")
+        st.write(f"**ID de Campaña:** `{campana_id if campana_id else 'N/A'}`")
+      
+        if donante_id_logueado and campana_id is not None:
+            if st.button(f"✨ Inscribirme a esta Campaña", key=f"inscribir_{campana_id}"):
+                if inscribirse_campana(campana_id, donante_id_logueado):
+                    st.balloons()
+                else:
+                    st.error("Fallo la inscripción.")
+        else:
+            st.info("Inicia sesión y completa tu perfil para poder inscribirte.")
+
+
 # --- Funciones de Campañas y Hospitales ---
 def donante_campanas():
     st.markdown("## Campañas de Donación Disponibles ❤️")
@@ -518,79 +567,88 @@ def donante_campanas():
     st.info(f"Tu tipo de sangre registrado es: **{donante_tipo_sangre}**")
 
 
-    campanas_disponibles = obtener_campanas_activas()
-    campanas_compatibles = []
+    if donante_tipo_sangre not in BLOOD_COMPATIBILITY_MAP:
+        st.warning(f"Tipo de sangre '{donante_tipo_sangre}' no reconocido en el mapa de compatibilidad. Por favor, verifica tu perfil.")
+        return
 
-    if campanas_disponibles:
-        for campana in campanas_disponibles:
-            beneficiario_id = campana.get('id_beneficiario')
-            tipo_sangre_requerida = None
+    # Ubicación del donante (geocodificada una vez por sesión) para ordenar por cercanía
+    lat, lon = None, None
+    if donante_data.get('direccion'):
+        lat, lon = obtener_ubicacion_donante(donante_data)
+    if lat is None or lon is None:
+        st.info("ℹ️ Completa tu dirección en 'Mi Perfil' para ordenar las campañas por cercanía.")
 
-            # Si la campaña tiene un beneficiario asociado, obtener su tipo de sangre
-            if beneficiario_id:
-                tipo_sangre_requerida = obtener_tipo_sangre_beneficiario(beneficiario_id)
-            else:
-                # Si la campaña no tiene beneficiario (ej. es una campaña de hospital),
-                # se asume que puede recibir de cualquier tipo o se filtra por un criterio específico
-                # Para este ejemplo, si no hay beneficiario, se considera universalmente compatible.
-                tipo_sangre_requerida = "Universal" # Un valor ficticio para indicar universalidad
-
-            # Verificar compatibilidad
-            if donante_tipo_sangre in BLOOD_COMPATIBILITY_MAP:
-                # Si la campaña es de un beneficiario, verificar si el tipo de sangre del donante
-                # puede donar al tipo de sangre requerido por el beneficiario.
-                if tipo_sangre_requerida != "Universal" and tipo_sangre_requerida in BLOOD_COMPATIBILITY_MAP[donante_tipo_sangre]:
-                    campanas_compatibles.append(campana)
-                # Si es una campaña "Universal" (sin beneficiario), siempre es compatible
-                elif tipo_sangre_requerida == "Universal":
-                     campanas_compatibles.append(campana)
-            else:
-                st.warning(f"Tipo de sangre '{donante_tipo_sangre}' no reconocido en el mapa de compatibilidad. Por favor, verifica tu perfil.")
-                break # Salir del bucle si el tipo de sangre del donante es inválido
+    opciones_radio = {"Sin límite": None, "5 km": 5, "10 km": 10, "25 km": 25, "50 km": 50}
+    radio = st.selectbox("Mostrar campañas a menos de", list(opciones_radio), key="radio_campanas", disabled=lat is None)
+
+    lista_campanas(donante_tipo_sangre, donante_id_logueado, lat, lon, opciones_radio[radio])
+
+
+def mostrar_mas_campanas():
+    st.session_state["campanas_mostradas"] = st.session_state.get("campanas_mostradas", CAMPANAS_POR_PAGINA) + CAMPANAS_POR_PAGINA
+
+
+# Fragmento en vivo: cada LIVE_UPDATE_INTERVAL segundos vuelve a ejecutarse solo esta lista.
+# Lee el feed compartido en memoria, que se descarta cuando alguien crea, aprueba, rechaza
+# o finaliza una campaña (en este proceso o en otra réplica), así que mientras nada cambie
+# no consulta la base de datos.
+@st.fragment(run_every=LIVE_UPDATE_INTERVAL)
+def lista_campanas(donante_tipo_sangre, donante_id_logueado, lat, lon, radio_km):
+    # Las campañas compatibles con cada tipo de sangre se calculan una vez para todo el
+    # proceso (ver campaign_feed.py).
+    campanas = get_campaign_feed().get(donante_tipo_sangre, obtener_campanas_activas)
+
+    nuevas = new_items("campanas_donante", (c.get('id_campana') for c in campanas))
+    if nuevas:
+        st.toast(f"🔔 {len(nuevas)} campaña(s) nueva(s) compatible(s) con tu tipo de sangre.")
 
+    # Puntaje combinado (cercanía, urgencia por fecha_fin y compatibilidad), calculado
+    # de forma vectorizada sobre todas las campañas.
+    campanas_compatibles = rank_campaigns(
+        campanas, donante_tipo_sangre, lat, lon, radius_km=radio_km
+    )
 
     if campanas_compatibles:
         st.subheader("Campañas compatibles con tu tipo de sangre:")
-        for campana in campanas_compatibles:
-            with st.container(border=True): # Use st.container with border for each campaign
-                campana_nombre = campana.get('nombre_campana', 'Sin Nombre')
-                beneficiario_id = campana.get('id_beneficiario')
-                tipo_sangre_beneficiario = "N/A" # Default para si no hay beneficiario o falla la consulta
-                if beneficiario_id and supabase_client:
-                    # Aquí volvemos a obtener el tipo de sangre del beneficiario para mostrarlo,
-                    # aunque ya lo usamos para el filtro. Podría optimizarse si se guarda
-                    # el tipo de sangre directamente en el objeto campana.
-                    beneficiario_data = supabase_client.table("beneficiario").select("tipo_de_sangre").eq("id_beneficiario", beneficiario_id).execute()
-                    if beneficiario_data.data:
-                        tipo_sangre_beneficiario = beneficiario_data.data[0].get('tipo_de_sangre', 'N/A')
-
-
-                campana_id = campana.get('id_campana')
-
-
-                st.markdown(f"### Campaña: {campana_nombre}")
-                if beneficiario_id: # Mostrar tipo de sangre requerido solo si es de un beneficiario
-                    st.write(f"**Tipo de Sangre Compatible con:** **{tipo_sangre_beneficiario}**") # CAMBIO AQUÍ
-                else:
-                    st.write(f"**Tipo de Sangre Compatible con:** **Cualquiera** (Campaña solidaria del hospital)") # Mensaje para campañas sin beneficiario
-                
-                st.write(f"**Descripción:** {campana.get('descripcion', 'N/A')}")
-                st.write(f"**Fecha Límite:** {campana.get('fecha_fin', 'N/A')}")
-                st.write(f"**ID de Campaña:** `{campana_id if campana_id else 'N/A'}`")
-              
-                if donante_id_logueado and campana_id is not None:
-                    if st.button(f"✨ Inscribirme a esta Campaña", key=f"inscribir_{campana_id}"):
-                        if inscribirse_campana(campana_id, donante_id_logueado):
-                            st.balloons()
-                        else:
-                            st.error("Fallo la inscripción.")
-                else:
-                    st.info("Inicia sesión y completa tu perfil para poder inscribirte.")
+        # Se muestran de a CAMPANAS_POR_PAGINA tarjetas para no renderizar cientos de una vez
+        mostradas = st.session_state.setdefault("campanas_mostradas", CAMPANAS_POR_PAGINA)
+        for campana, _puntaje, distancia_km in campanas_compatibles[:mostradas]:
+            tarjeta_campana(campana, donante_id_logueado, distancia_km)
             st.markdown("---")
+        if len(campanas_compatibles) > mostradas:
+            st.caption(f"Mostrando {mostradas} de {len(campanas_compatibles)} campañas.")
+            # El callback corre antes de volver a ejecutar el fragmento, así no hace falta st.rerun()
+            st.button("Ver más campañas", key="ver_mas_campanas", on_click=mostrar_mas_campanas)
     else:
         st.info("ℹ️ No hay campañas de donación compatibles con tu tipo de sangre en este momento, o no hay campañas activas aprobadas.")
 
 
+# Fragmento: mover el control de cantidad solo vuelve a ejecutar esta sección, no el mapa.
+@st.fragment
+def hospitales_cercanos(hospitales):
+    st.markdown("### 📍 Hospitales cerca de mí")
+    donante_data = obtener_datos_donante(st.session_state.get('user_email'))
+    direccion_donante = donante_data.get('direccion') if donante_data else None
+    if not direccion_donante:
+        st.info("ℹ️ Completa tu dirección en 'Mi Perfil' para ver los hospitales más cercanos.")
+        return
+
+    lat, lon = obtener_ubicacion_donante(donante_data)
+    if lat is None or lon is None:
+        return
+
+    cantidad = st.slider("Cantidad de hospitales a mostrar", min_value=1, max_value=10, value=3, key="cantidad_hospitales_cercanos")
+    cercanos = obtener_indice_hospitales(hospitales).nearest(lat, lon, k=cantidad)
+    if not cercanos:
+        st.info("ℹ️ Todavía no hay hospitales con ubicación cargada.")
+        return
+    for hospital, distancia in cercanos:
+        st.markdown(
+            f"**{hospital.get('nombre_hospital', 'Nombre no disponible')}** — {distancia:.1f} km  \n"
+            f"{hospital.get('direccion', 'Dirección no disponible')} · ☎️ {hospital.get('telefono', 'Teléfono no disponible')}"
+        )
+
+
 def donante_hospitales():
     st.markdown("## Hospitales Asociados 🏥")
     st.markdown("---")
@@ -598,11 +656,10 @@ def donante_hospitales():
     
     hospitales = obtener_hospitales()
 
-    if OPENCAGE_API_KEY is None:
-        st.warning("⚠️ La clave API de OpenCage Geocoding no está configurada. El mapa no mostrará ubicaciones reales.")
-        st.info("Por favor, configura la variable de entorno `OPENCAGE_API_KEY` con tu clave de API de OpenCage.")
-    
     if hospitales:
+        hospitales_cercanos(hospitales)
+        st.markdown("---")
+
         # Coordenadas aproximadas de Buenos Aires para centrar el mapa si no hay hospitales o falla la geocodificación
         map_center_lat, map_center_lon = -34.6037, -58.3816
         has_geocoded_hospital = False
@@ -614,7 +671,7 @@ def donante_hospitales():
             direccion = hospital.get('direccion', 'Dirección no disponible')
             telefono = hospital.get('telefono', 'Teléfono no disponible')
 
-            lat, lon = geocode_address(direccion) # Obtener coordenadas reales
+            lat, lon = hospital.get('lat'), hospital.get('lon') # Coordenadas guardadas en la base de datos
             
             if lat is not None and lon is not None:
                 has_geocoded_hospital = True
@@ -626,7 +683,7 @@ def donante_hospitales():
                     icon=folium.Icon(color="red", icon="hospital", prefix='fa') # Icono de hospital
                 ).add_to(m)
             else:
-                st.warning(f"⚠️ No se pudo geocodificar la dirección para el hospital: {nombre} ({direccion}).")
+                st.warning(f"⚠️ El hospital {nombre} ({direccion}) todavía no tiene su ubicación cargada.")
 
         # Ajustar el centro del mapa si se geocodificó al menos un hospital
         if has_geocoded_hospital:
@@ -704,6 +761,7 @@ def donante_perfil_page():
     st.markdown(f"<h1 style='color: var(--primary-red);'>👤 Panel de Donante</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; font-size: 1.2em; color: var(--dark-grey-text);'>Gestiona tu perfil y descubre campañas de donación.</p>", unsafe_allow_html=True)
     st.markdown("---")
+    show_flashes()
 
 
     # Botón de cerrar sesión en la barra lateral
@@ -711,18 +769,24 @@ def donante_perfil_page():
     st.sidebar.success(f"Sesión iniciada como: **{st.session_state['user_type']}**")
 
 
-    # Crea las pestañas para el donante
-    tab1, tab2, tab3, tab4 = st.tabs(["Mi Perfil", "Campañas Activas", "Hospitales", "Requisitos"])
-
-
-    with tab1:
-        donante_perfil()
-    with tab2:
-        donante_campanas()
-    with tab3:
-        donante_hospitales()
-    with tab4:
-        donante_requisitos()
+    # Crea las pestañas para el donante.
+    # Con on_change="rerun" solo se ejecuta la pestaña abierta: editar el perfil no
+    # vuelve a cargar las campañas ni a geocodificar hospitales para armar el mapa.
+    tab1, tab2, tab3, tab4 = st.tabs(["Mi Perfil", "Campañas Activas", "Hospitales", "Requisitos"], key="donante_tabs", on_change="rerun")
+
+
+    if tab1.open:
+        with tab1:
+            donante_perfil()
+    if tab2.open:
+        with tab2:
+            donante_campanas()
+    if tab3.open:
+        with tab3:
+            donante_hospitales()
+    if tab4.open:
+        with tab4:
+            donante_requisitos()
 
 
 if __name__ == "__main__":
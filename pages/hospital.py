@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
-import time
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from supabase_conn import get_supabase_client
+from cache import session_get, session_set, session_invalidate, shared_get # Cachés por sesión y compartida
+from ui import flash, show_flashes # Mensajes de confirmación que sobreviven a st.rerun()
+from live_updates import LIVE_UPDATE_INTERVAL, new_items # Secciones que se actualizan solas
+from geocoding import geocode_columns # Coordenadas que se guardan junto a la dirección
+from matching import DonorMatcher # Búsqueda de donantes compatibles
 from datetime import datetime, time as dt_time
 
 # --- Configuración de la página de Streamlit ---
@@ -28,7 +33,7 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     st.info("Por favor, confíguralas para que la conexión a la base de datos funcione.")
 else:
     try:
-        supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase_client = get_supabase_client()
     except Exception as e:
         st.error(f"Error al inicializar cliente Supabase: {e}")
         supabase_client = None
@@ -185,13 +190,19 @@ st.markdown("""
 
 
 # --- Función para obtener datos del hospital ---
+# El perfil se guarda en la caché de la sesión y solo se vuelve a consultar
+# después de actualizar_datos_hospital().
 def obtener_datos_hospital(hospital_email):
+    perfil_en_cache = session_get(("hospital", hospital_email))
+    if perfil_en_cache is not None:
+        return perfil_en_cache
     if supabase_client is None:
         st.error("Conexión a Supabase no disponible. No se pueden obtener datos del hospital.")
         return None
     try:
         response = supabase_client.table("hospital").select("*").eq("mail", hospital_email).execute()
         if response.data:
+            session_set(("hospital", hospital_email), response.data[0])
             return response.data[0]
         else:
             return None
@@ -206,10 +217,16 @@ def actualizar_datos_hospital(hospital_email, datos):
         st.error("Conexión a Supabase no disponible. No se pueden actualizar datos del hospital.")
         return False
     try:
+        # Geocodificar solo si la dirección cambió (o todavía no tiene coordenadas)
+        perfil_actual = obtener_datos_hospital(hospital_email) or {}
+        if "direccion" in datos and (
+            datos["direccion"] != perfil_actual.get("direccion") or perfil_actual.get("lat") is None
+        ):
+            datos = {**datos, **geocode_columns(datos["direccion"])}
         response = supabase_client.table("hospital").update(datos).eq("mail", hospital_email).execute()
         if response.data:
-            st.success("✅ ¡Perfil del Hospital actualizado con éxito!")
-            time.sleep(1)
+            session_invalidate(("hospital", hospital_email)) # El perfil en caché quedó desactualizado
+            flash("✅ ¡Perfil del Hospital actualizado con éxito!")
             st.rerun()
             return True
         else:
@@ -221,34 +238,44 @@ def actualizar_datos_hospital(hospital_email, datos):
 
 
 # --- Funciones para Campañas Solidarias del Hospital (recolección) ---
+# Las lecturas pasan por la caché compartida (cache.shared_get) etiquetadas con sus tablas:
+# cualquier escritura de la app en esas tablas las descarta (ver supabase_conn._invalidate_on_write).
+def _consultar_campanas_solidarias(hospital_id):
+    # Incluir 'descripcion' y 'fecha_fin' para mostrar detalles completos
+    response = supabase_client.table("campana").select("id_campana, nombre_campana, fecha_inicio, fecha_fin, estado_campana, descripcion, id_beneficiario").eq("id_hospital", hospital_id).order("fecha_inicio", desc=False).execute()
+    return response.data or []
+
+
 def obtener_campanas_solidarias_hospital(hospital_id):
     if supabase_client:
         try:
-            # Incluir 'descripcion' y 'fecha_fin' para mostrar detalles completos
-            response = supabase_client.table("campana").select("id_campana, nombre_campana, fecha_inicio, fecha_fin, estado_campana, descripcion, id_beneficiario").eq("id_hospital", hospital_id).order("fecha_inicio", desc=False).execute()
-            if response.data:
-                return response.data
-            else:
-                return []
+            return shared_get(
+                ("campanas_hospital", hospital_id),
+                lambda: _consultar_campanas_solidarias(hospital_id),
+                tags=("campana",),
+            )
         except Exception as e:
             st.error(f"❌ Error al obtener campañas solidarias: {e}")
             return []
     return []
 
-# Función corregida: Usar "*" para el conteo de inscripciones
-def obtener_conteo_inscripciones_campana(id_campana):
+# Conteo de inscripciones de todas las campañas del hospital en una sola consulta
+# (vista campana_inscripciones, ver sql/002_conteo_inscripciones.sql)
+def obtener_conteos_inscripciones_hospital(hospital_id):
+    """Devuelve un diccionario {id_campana: cantidad de inscriptos} para las campañas del hospital."""
     if supabase_client is None:
-        return 0
+        return {}
     try:
-        # Se ha corregido la selección a "*" para evitar el error de columna inexistente
-        response = supabase_client.table("donaciones").select("*", count="exact").eq("id_campana", id_campana).execute()
-        if response.count is not None:
-            return response.count
-        else:
-            return 0
+        # La vista cuenta filas de donaciones agrupadas por campana
+        filas = shared_get(
+            ("conteos_inscripciones", hospital_id),
+            lambda: supabase_client.table("campana_inscripciones").select("id_campana, inscripciones").eq("id_hospital", hospital_id).execute().data or [],
+            tags=("campana", "donaciones"),
+        )
+        return {fila['id_campana']: fila['inscripciones'] for fila in filas}
     except Exception as e:
-        st.error(f"❌ Error al obtener conteo de inscripciones para campaña {id_campana}: {e}")
-        return 0
+        st.error(f"❌ Error al obtener conteo de inscripciones de las campañas: {e}")
+        return {}
 
 
 def crear_nueva_campana_solidaria(datos_campana):
@@ -263,7 +290,7 @@ def crear_nueva_campana_solidaria(datos_campana):
         
         data, count = supabase_client.table("campana").insert(datos_campana).execute()
         if data and len(data) > 0:
-            st.success("🎉 ¡Nueva campaña solidaria publicada con éxito!")
+            flash("🎉 ¡Nueva campaña solidaria publicada con éxito!", balloons=True)
             return True
         else:
             st.error(f"❌ No se pudo publicar la nueva campaña solidaria. Detalles: {data}")
@@ -279,7 +306,7 @@ def finalizar_campana_solidaria(campana_id):
     try:
         response = supabase_client.table("campana").update({"estado_campana": "Finalizada"}).eq("id_campana", campana_id).execute()
         if response.data:
-            st.success(f"✅ Campaña {campana_id} finalizada con éxito.")
+            flash(f"✅ Campaña {campana_id} finalizada con éxito.", scope=f"campana_{campana_id}")
             return True
         else:
             st.error(f"❌ Error al finalizar campaña: {response.status_code} - {response.text}")
@@ -296,11 +323,11 @@ def obtener_solicitudes_campana_pendientes(hospital_id):
     if supabase_client is None:
         return []
     try:
-        response = supabase_client.table("campana").select("id_campana, nombre_campana, descripcion, fecha_inicio, fecha_fin, id_beneficiario, estado_campana").eq("id_hospital", hospital_id).eq("estado_aprobacion_hospital", "Pendiente").order("fecha_inicio", desc=False).execute()
-        if response.data:
-            return response.data
-        else:
-            return []
+        return shared_get(
+            ("solicitudes_pendientes", hospital_id),
+            lambda: supabase_client.table("campana").select("id_campana, nombre_campana, descripcion, fecha_inicio, fecha_fin, id_beneficiario, estado_campana").eq("id_hospital", hospital_id).eq("estado_aprobacion_hospital", "Pendiente").order("fecha_inicio", desc=False).execute().data or [],
+            tags=("campana",),
+        )
     except Exception as e:
         st.error(f"❌ Error al obtener solicitudes de campaña pendientes: {e}")
         return []
@@ -310,9 +337,13 @@ def obtener_nombre_beneficiario(beneficiario_id):
     if supabase_client is None:
         return "Desconocido"
     try:
-        response = supabase_client.table("beneficiario").select("nombreb").eq("id_beneficiario", beneficiario_id).limit(1).execute()
-        if response.data and response.data[0]['nombreb']:
-            return response.data[0]['nombreb']
+        filas = shared_get(
+            ("nombre_beneficiario", beneficiario_id),
+            lambda: supabase_client.table("beneficiario").select("nombreb").eq("id_beneficiario", beneficiario_id).limit(1).execute().data or [],
+            tags=("beneficiario",),
+        )
+        if filas and filas[0]['nombreb']:
+            return filas[0]['nombreb']
         else:
             return "Beneficiario Desconocido"
     except Exception as e:
@@ -331,7 +362,7 @@ def aceptar_solicitud_campana(campana_id):
         }).eq("id_campana", campana_id).execute()
         
         if response.data:
-            st.success(f"✅ Solicitud de campaña {campana_id} **APROBADA** con éxito. La campaña ya está activa para donantes.")
+            flash(f"✅ Solicitud de campaña {campana_id} **APROBADA** con éxito. La campaña ya está activa para donantes.", balloons=True, scope=f"solicitud_{campana_id}")
             return True
         else:
             st.error(f"❌ Error al aceptar solicitud de campaña: {response.status_code} - {response.text}")
@@ -352,7 +383,7 @@ def rechazar_solicitud_campana(campana_id):
         }).eq("id_campana", campana_id).execute()
         
         if response.data:
-            st.warning(f"🚫 Solicitud de campaña {campana_id} **RECHAZADA** con éxito.")
+            flash(f"🚫 Solicitud de campaña {campana_id} **RECHAZADA** con éxito.", kind="warning", scope=f"solicitud_{campana_id}")
             return True
         else:
             st.error(f"❌ Error al rechazar solicitud de campaña: {response.status_code} - {response.text}")
@@ -362,6 +393,41 @@ def rechazar_solicitud_campana(campana_id):
         return False
 
 
+# Cada solicitud es un fragmento: aceptar o rechazar solo vuelve a ejecutar su tarjeta.
+# La decisión se guarda en la sesión para mostrar la tarjeta ya resuelta sin volver a
+# consultar la lista de solicitudes.
+@st.fragment
+def tarjeta_solicitud(solicitud, nombre_beneficiario):
+    campana_id = solicitud.get('id_campana')
+    resolucion = st.session_state.get(f"solicitud_resuelta_{campana_id}")
+
+    with st.container(border=True):
+        st.markdown(f"### Solicitud: {solicitud.get('nombre_campana', 'Campaña sin nombre')}")
+        st.write(f"**De:** {nombre_beneficiario}")
+
+        if resolucion:
+            show_flashes(scope=f"solicitud_{campana_id}")
+            st.write(f"**Aprobación:** `{resolucion}`")
+            return
+
+        st.write(f"**Descripción:** {solicitud.get('descripcion', 'N/A')}")
+        st.write(f"**Fecha de Inicio Solicitada:** {solicitud.get('fecha_inicio', 'N/A')}")
+        st.write(f"**Fecha Límite Solicitada:** {solicitud.get('fecha_fin', 'N/A')}")
+        st.write(f"**Estado Actual:** `{solicitud.get('estado_campana', 'N/A')}` (Aprobación: `Pendiente`)")
+
+        col_aprobar, col_rechazar = st.columns(2)
+        with col_aprobar:
+            if st.button(f"✅ Aceptar Solicitud", key=f"aceptar_{campana_id}"):
+                if aceptar_solicitud_campana(campana_id):
+                    st.session_state[f"solicitud_resuelta_{campana_id}"] = "Aprobada"
+                    st.rerun(scope="fragment")
+        with col_rechazar:
+            if st.button(f"❌ Rechazar Solicitud", key=f"rechazar_{campana_id}"):
+                if rechazar_solicitud_campana(campana_id):
+                    st.session_state[f"solicitud_resuelta_{campana_id}"] = "Rechazada"
+                    st.rerun(scope="fragment")
+
+
 def hospital_solicitudes_campana():
     st.markdown("## Solicitudes de Campaña Pendientes 📬")
     st.markdown("---")
@@ -372,34 +438,25 @@ def hospital_solicitudes_campana():
     if not hospital_id_logueado:
         st.warning("⚠️ No se encontró el ID de hospital en la sesión. Por favor, asegúrate de que tu perfil de hospital esté completo y tenga un ID válido.")
         return
-    
+
+    lista_solicitudes(hospital_id_logueado)
+
+
+# Fragmento en vivo: cada LIVE_UPDATE_INTERVAL segundos vuelve a ejecutarse solo la lista de
+# solicitudes. Se lee de la caché compartida, que se descarta cuando un beneficiario crea una
+# campaña (en este proceso o en otra réplica), así que mientras nada cambie no consulta la base.
+@st.fragment(run_every=LIVE_UPDATE_INTERVAL)
+def lista_solicitudes(hospital_id_logueado):
     solicitudes_pendientes = obtener_solicitudes_campana_pendientes(hospital_id_logueado)
 
+    nuevas = new_items("solicitudes_hospital", (s.get('id_campana') for s in solicitudes_pendientes))
+    if nuevas:
+        st.toast(f"📬 {len(nuevas)} nueva(s) solicitud(es) de campaña pendiente(s).")
+
     if solicitudes_pendientes:
         for solicitud in solicitudes_pendientes:
-            campana_id = solicitud.get('id_campana')
             nombre_beneficiario = obtener_nombre_beneficiario(solicitud.get('id_beneficiario'))
-            
-            with st.container(border=True):
-                st.markdown(f"### Solicitud: {solicitud.get('nombre_campana', 'Campaña sin nombre')}")
-                st.write(f"**De:** {nombre_beneficiario}")
-                st.write(f"**Descripción:** {solicitud.get('descripcion', 'N/A')}")
-                st.write(f"**Fecha de Inicio Solicitada:** {solicitud.get('fecha_inicio', 'N/A')}")
-                st.write(f"**Fecha Límite Solicitada:** {solicitud.get('fecha_fin', 'N/A')}")
-                st.write(f"**Estado Actual:** `{solicitud.get('estado_campana', 'N/A')}` (Aprobación: `Pendiente`)")
-
-                col_aprobar, col_rechazar = st.columns(2)
-                with col_aprobar:
-                    if st.button(f"✅ Aceptar Solicitud", key=f"aceptar_{campana_id}"):
-                        if aceptar_solicitud_campana(campana_id):
-                            st.balloons()
-                            time.sleep(1)
-                            st.rerun()
-                with col_rechazar:
-                    if st.button(f"❌ Rechazar Solicitud", key=f"rechazar_{campana_id}"):
-                        if rechazar_solicitud_campana(campana_id):
-                            time.sleep(1)
-                            st.rerun()
+            tarjeta_solicitud(solicitud, nombre_beneficiario)
             st.markdown("---")
     else:
         st.info("🎉 No hay solicitudes de campaña pendientes para tu hospital en este momento.")
@@ -466,6 +523,36 @@ def hospital_perfil():
                 st.info("Por favor, asegúrate de que el hospital ya exista en la base de datos para poder actualizar su perfil.")
 
 
+# Cada campaña es un fragmento: finalizarla solo vuelve a ejecutar su tarjeta.
+@st.fragment
+def tarjeta_campana_solidaria(campana, conteo_inscripciones):
+    campana_id = campana.get('id_campana')
+    # Si la campaña se finalizó desde esta tarjeta, se muestra el nuevo estado sin volver a consultar
+    estado = st.session_state.get(f"campana_finalizada_{campana_id}") or campana.get("estado_campana", "N/A")
+    nombre_campana = campana.get('nombre_campana', 'Sin Nombre')
+    descripcion = campana.get('descripcion', 'N/A')
+    fecha_inicio = campana.get('fecha_inicio', 'N/A')
+    fecha_fin = campana.get('fecha_fin', 'N/A')
+
+    with st.container(border=True):
+        st.markdown(f"#### {nombre_campana}")
+        st.write(f"**Estado:** `{estado}`")
+        st.write(f"**Descripción:** {descripcion}")
+        st.write(f"**Fecha de Inicio:** {fecha_inicio}")
+        st.write(f"**Fecha de Fin:** {fecha_fin}")
+        st.write(f"**Donantes Inscriptos:** {conteo_inscripciones}")
+        show_flashes(scope=f"campana_{campana_id}")
+        
+        # Botón para finalizar campaña solo si no está ya finalizada
+        if estado != "Finalizada":
+            if st.button(f"Finalizar Campaña '{nombre_campana}'", key=f"finalizar_{campana_id}"):
+                if finalizar_campana_solidaria(campana_id):
+                    st.session_state[f"campana_finalizada_{campana_id}"] = "Finalizada"
+                    st.rerun(scope="fragment")
+        else:
+            st.info("Esta campaña ha sido finalizada.")
+
+
 def hospital_campanas_solidarias():
     st.markdown("## Mis Campañas Solidarias (Recolección en Hospital) 📢")
     st.markdown("---")
@@ -511,46 +598,152 @@ def hospital_campanas_solidarias():
                     "estado_aprobacion_hospital": "Aprobada" # Las campañas creadas por el hospital se auto-aprueban
                 }
                 if crear_nueva_campana_solidaria(datos_campana):
-                    st.balloons()
                     st.rerun()
 
     st.markdown("---")
     st.markdown("### Campañas Solidarias Existentes")
 
+    lista_campanas_solidarias(hospital_id_logueado)
+
+
+# Fragmento en vivo: los conteos de inscriptos se actualizan solos cuando un donante se inscribe,
+# sin volver a ejecutar el formulario de arriba.
+@st.fragment(run_every=LIVE_UPDATE_INTERVAL)
+def lista_campanas_solidarias(hospital_id_logueado):
     campanas = obtener_campanas_solidarias_hospital(hospital_id_logueado)
 
     if campanas:
+        conteos_inscripciones = obtener_conteos_inscripciones_hospital(hospital_id_logueado)
         for campana in campanas:
             # Solo mostrar campañas que son propias del hospital (id_beneficiario es None) o que ya están aprobadas
             if campana.get('id_beneficiario') is None or campana.get('estado_aprobacion_hospital') == 'Aprobada':
-                estado = campana.get("estado_campana", "N/A")
-                nombre_campana = campana.get('nombre_campana', 'Sin Nombre')
-                descripcion = campana.get('descripcion', 'N/A')
-                fecha_inicio = campana.get('fecha_inicio', 'N/A')
-                fecha_fin = campana.get('fecha_fin', 'N/A')
-                
-                conteo_inscripciones = obtener_conteo_inscripciones_campana(campana.get('id_campana'))
-
-                with st.container(border=True):
-                    st.markdown(f"#### {nombre_campana}")
-                    st.write(f"**Estado:** `{estado}`")
-                    st.write(f"**Descripción:** {descripcion}")
-                    st.write(f"**Fecha de Inicio:** {fecha_inicio}")
-                    st.write(f"**Fecha de Fin:** {fecha_fin}")
-                    st.write(f"**Donantes Inscriptos:** {conteo_inscripciones}")
-                    
-                    # Botón para finalizar campaña solo si no está ya finalizada
-                    if estado != "Finalizada":
-                        if st.button(f"Finalizar Campaña '{nombre_campana}'", key=f"finalizar_{campana.get('id_campana')}"):
-                            if finalizar_campana_solidaria(campana.get("id_campana")):
-                                st.rerun()
-                    else:
-                        st.info("Esta campaña ha sido finalizada.")
+                conteo_inscripciones = conteos_inscripciones.get(campana.get('id_campana'), 0)
+                tarjeta_campana_solidaria(campana, conteo_inscripciones)
                 st.markdown("---")
     else:
         st.info("No hay campañas solidarias disponibles para tu hospital.")
 
 
+# --- Búsqueda de donantes compatibles ---
+# Solo las columnas que usa el matching (no se traen contraseñas ni antecedentes médicos)
+COLUMNAS_DONANTE_MATCHING = "id_donante, nombred, mail, telefono, tipo_de_sangre, edad, cumple_requisitos, lat, lon"
+# PostgREST devuelve como máximo 1000 filas por consulta: los donantes se leen por páginas
+TAMANO_PAGINA_DONANTES = 1000
+# Segundos que se reutiliza el índice de donantes antes de volver a leerlos (también se
+# descarta en cuanto la app escribe en la tabla donante)
+VIGENCIA_INDICE_DONANTES = 300
+
+
+def _consultar_donantes_para_matching():
+    donantes = []
+    inicio = 0
+    while True:
+        response = (
+            supabase_client.table("donante")
+            .select(COLUMNAS_DONANTE_MATCHING)
+            .eq("cumple_requisitos", True)
+            .order("id_donante")
+            .range(inicio, inicio + TAMANO_PAGINA_DONANTES - 1)
+            .execute()
+        )
+        donantes.extend(response.data or [])
+        if not response.data or len(response.data) < TAMANO_PAGINA_DONANTES:
+            return donantes
+        inicio += TAMANO_PAGINA_DONANTES
+
+
+# El índice columnar de donantes se arma una vez por proceso y lo comparten todos los hospitales
+def obtener_matcher_donantes():
+    if supabase_client is None:
+        st.error("Conexión a Supabase no disponible. No se pueden obtener donantes.")
+        return None
+    try:
+        return shared_get(
+            ("matcher_donantes",),
+            lambda: DonorMatcher(_consultar_donantes_para_matching()),
+            ttl=VIGENCIA_INDICE_DONANTES, tags=("donante",),
+        )
+    except Exception as e:
+        st.error(f"❌ Error al obtener donantes: {e}")
+        return None
+
+
+def obtener_campanas_para_buscar_donantes(hospital_id):
+    if supabase_client is None:
+        return []
+    try:
+        # El tipo de sangre del beneficiario viene embebido en la misma consulta
+        return shared_get(
+            ("campanas_buscar_donantes", hospital_id),
+            lambda: (
+                supabase_client.table("campana")
+                .select("id_campana, nombre_campana, fecha_fin, id_beneficiario, beneficiario(tipo_de_sangre)")
+                .eq("id_hospital", hospital_id)
+                .eq("estado_aprobacion_hospital", "Aprobada") # Sin solicitudes pendientes ni rechazadas
+                .neq("estado_campana", "Finalizada")
+                .order("fecha_fin", desc=False)
+                .execute()
+            ).data or [],
+            tags=("campana", "beneficiario"),
+        )
+    except Exception as e:
+        st.error(f"❌ Error al obtener campañas: {e}")
+        return []
+
+
+def hospital_buscar_donantes():
+    st.markdown("## Buscar Donantes Compatibles 🔎")
+    st.markdown("---")
+    st.write("Encuentra donantes que pueden ayudar a una campaña según el tipo de sangre del beneficiario y la cercanía a tu hospital.")
+
+    hospital_id_logueado = st.session_state.get("user_db_id")
+    if not hospital_id_logueado:
+        st.warning("⚠️ Para buscar donantes, asegúrate de que tu perfil de hospital esté completo y tenga un ID válido.")
+        return
+
+    campanas = obtener_campanas_para_buscar_donantes(hospital_id_logueado)
+    if not campanas:
+        st.info("ℹ️ Tu hospital no tiene campañas activas o próximas.")
+        return
+
+    opciones = {f"{c.get('nombre_campana', 'Sin Nombre')} (hasta {c.get('fecha_fin', 'N/A')})": c for c in campanas}
+    campana = opciones[st.selectbox("Campaña", list(opciones), key="buscar_donantes_campana")]
+    tipo_sangre = (campana.get('beneficiario') or {}).get('tipo_de_sangre')
+    st.write(f"**Tipo de sangre requerido:** {tipo_sangre or 'Cualquiera (campaña solidaria del hospital)'}")
+
+    perfil = obtener_datos_hospital(st.session_state.get("user_email")) or {}
+    lat, lon = perfil.get('lat'), perfil.get('lon')
+    if lat is None or lon is None:
+        st.info("ℹ️ Tu hospital todavía no tiene ubicación cargada: actualiza la dirección en 'Mi Perfil' para buscar donantes por cercanía.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        distancia_maxima = st.slider("Distancia máxima (km)", min_value=1, max_value=100, value=20, key="buscar_donantes_distancia", disabled=lat is None)
+    with col2:
+        limite = st.number_input("Cantidad máxima de donantes", min_value=10, max_value=500, value=50, step=10, key="buscar_donantes_limite")
+
+    matcher = obtener_matcher_donantes()
+    if matcher is None:
+        return
+    resultados = matcher.match(tipo_sangre, lat, lon, max_km=distancia_maxima if lat is not None else None, limit=int(limite))
+
+    if resultados:
+        st.success(f"Se encontraron {len(resultados)} donantes compatibles.")
+        st.dataframe(pd.DataFrame([
+            {
+                "Nombre": donante.get('nombred'),
+                "Tipo de sangre": donante.get('tipo_de_sangre'),
+                "Edad": donante.get('edad'),
+                "Distancia (km)": round(distancia, 1) if distancia is not None else None,
+                "Teléfono": donante.get('telefono'),
+                "Mail": donante.get('mail'),
+            }
+            for donante, distancia in resultados
+        ]), hide_index=True, width="stretch")
+    else:
+        st.info("ℹ️ No se encontraron donantes compatibles que cumplan los requisitos con estos filtros.")
+
+
 # --- Función principal de la página del Hospital ---
 def hospital_panel_page():
     # Inicializa las session_state variables si no existen
@@ -575,20 +768,28 @@ def hospital_panel_page():
     st.markdown(f"<h1 style='color: var(--primary-red);'>🏥 Panel de Hospital</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; font-size: 1.2em; color: var(--dark-grey-text);'>Gestiona tu perfil y organiza campañas de donación.</p>", unsafe_allow_html=True)
     st.markdown("---")
+    show_flashes()
 
     # Botón de cerrar sesión en la barra lateral
     st.sidebar.button("Cerrar Sesión", on_click=lambda: st.session_state.update({'logged_in': False, 'user_type': None, 'user_email': None, 'user_db_id': None}))
     st.sidebar.success(f"Sesión iniciada como: **{st.session_state['user_type']}**")
 
-    # Navegación por pestañas
-    tab1, tab2, tab3 = st.tabs(["Mi Perfil", "Campañas Solidarias", "Solicitudes de Campaña"]) # Nueva pestaña para solicitudes
-
-    with tab1:
-        hospital_perfil()
-    with tab2:
-        hospital_campanas_solidarias()
-    with tab3: # Nueva pestaña
-        hospital_solicitudes_campana()
+    # Navegación por pestañas.
+    # Con on_change="rerun" solo se ejecuta la pestaña abierta, las demás no consultan la base de datos.
+    tab1, tab2, tab3, tab4 = st.tabs(["Mi Perfil", "Campañas Solidarias", "Solicitudes de Campaña", "Buscar Donantes"], key="hospital_tabs", on_change="rerun") # Nueva pestaña para solicitudes
+
+    if tab1.open:
+        with tab1:
+            hospital_perfil()
+    if tab2.open:
+        with tab2:
+            hospital_campanas_solidarias()
+    if tab3.open: # Nueva pestaña
+        with tab3:
+            hospital_solicitudes_campana()
+    if tab4.open:
+        with tab4:
+            hospital_buscar_donantes()
 
 
 if __name__ == "__main__":
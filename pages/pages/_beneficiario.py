@@ -1,8 +1,9 @@
 import streamlit as st
-from supabase import create_client, Client
+from supabase import Client
+from supabase_conn import get_supabase_client
 import os
 from dotenv import load_dotenv
-import time # Importar time para usar time.sleep()
+from ui import flash, show_flashes # Mensajes de confirmación que sobreviven a st.rerun()
 
 # Carga las variables de entorno
 load_dotenv()
@@ -16,7 +17,7 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     supabase_client = None
 else:
     try:
-        supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase_client: Client = get_supabase_client()
     except Exception as e:
         st.error(f"Error al inicializar cliente Supabase en beneficiario.py: {e}")
         supabase_client = None
@@ -108,6 +109,7 @@ def create_new_campaign_db(beneficiario_id, tipo_sangre_requerida, cantidad_requ
 # --- Secciones de la página del Beneficiario ---
 def beneficiario_perfil():
     st.markdown("## Área de Beneficiario")
+    show_flashes()
 
     beneficiario_id = st.session_state.get('user_db_id')
     
@@ -172,8 +174,7 @@ def beneficiario_perfil():
                     # No actualizamos 'mail' ni 'id_beneficio' desde aquí
                 }
                 if update_beneficiario_profile_db(beneficiario_id, datos_a_actualizar):
-                    st.success("Perfil actualizado. Recargando datos...")
-                    time.sleep(1)
+                    flash("Perfil actualizado.")
                     st.rerun() # Para que los datos actualizados se reflejen
 
 
@@ -223,8 +224,7 @@ def beneficiario_perfil():
                          st.error("Por favor, ingresa la cantidad de unidades requeridas.")
                     else:
                         if create_new_campaign_db(beneficiario_id, default_blood_type, campaign_cantidad, campaign_descripcion, campaign_fecha_limite):
-                            st.success("Campaña creada. Recargando la página para mostrar el estado...")
-                            time.sleep(2)
+                            flash("Campaña creada.")
                             st.rerun()
 
 # --- Lógica principal de la página del Beneficiario (para ejecución directa si es necesario) ---
@@ -246,8 +246,7 @@ if __name__ == "__main__":
         st.session_state['user_type'] = 'Beneficiario'
         st.session_state['user_email'] = "ricardo.vargas@email.com" # Email de prueba
         st.session_state['user_db_id'] = 1 # ID de prueba, ajusta según tu DB.
-        st.info("Simulando inicio de sesión como beneficiario para desarrollo.")
-        time.sleep(1)
+        flash("Simulando inicio de sesión como beneficiario para desarrollo.", kind="info")
         st.rerun() # Recarga para aplicar la simulación de sesión
     
     st.sidebar.title("Navegación Beneficiario")
@@ -0,0 +1,127 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# Length of one degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat, lon, lats, lons):
+    """
+    Great-circle distance in kilometres from one point to many.
+
+    Args:
+        lat (float): Latitude of the origin, in degrees.
+        lon (float): Longitude of the origin, in degrees.
+        lats (numpy.ndarray): Latitudes of the targets, in degrees.
+        lons (numpy.ndarray): Longitudes of the targets, in degrees.
+
+    Returns:
+        numpy.ndarray: Distances in kilometres, one per target.
+    """
+    lat1 = math.radians(lat)
+    lats2 = np.radians(lats)
+    dlat = lats2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lats2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    """
+    In-memory spatial index of points bucketed in a regular latitude/longitude grid.
+
+    nearest() looks at the query cell first and then at rings of neighbouring
+    cells, stopping as soon as no unvisited cell can hold a closer point, so a
+    query only computes distances for the points around it. Items without
+    coordinates are left out of the index.
+
+    Example:
+        index = GridIndex(hospitales)
+        for hospital, km in index.nearest(-34.60, -58.38, k=3):
+            print(hospital["nombre_hospital"], round(km, 1))
+    """
+
+    def __init__(self, items, cell_km=5.0, lat_key="lat", lon_key="lon"):
+        self.items = [
+            item for item in items
+            if item.get(lat_key) is not None and item.get(lon_key) is not None
+        ]
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self.lats = np.array([item[lat_key] for item in self.items], dtype=np.float64)
+        self.lons = np.array([item[lon_key] for item in self.items], dtype=np.float64)
+        self._buckets = {}
+        if self.items:
+            cells = np.stack([self._cell(self.lats), self._cell(self.lons)], axis=1)
+            unique_cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+            order = np.argsort(inverse.ravel(), kind="stable")
+            groups = np.split(order, np.cumsum(np.bincount(inverse.ravel()))[:-1])
+            self._buckets = {(int(row), int(col)): group for (row, col), group in zip(unique_cells, groups)}
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cell(self, degrees):
+        return np.floor(np.asarray(degrees) / self.cell_deg).astype(np.int64)
+
+    def _ring(self, row, col, ring):
+        # Cells at Chebyshev distance `ring` from (row, col)
+        if ring == 0:
+            yield row, col
+            return
+        for dc in range(-ring, ring + 1):
+            yield row - ring, col + dc
+            yield row + ring, col + dc
+        for dr in range(-ring + 1, ring):
+            yield row + dr, col - ring
+            yield row + dr, col + ring
+
+    def _result(self, indices, distances, k, max_km):
+        order = np.argsort(distances, kind="stable")
+        if max_km is not None:
+            order = order[distances[order] <= max_km]
+        return [(self.items[indices[i]], float(distances[i])) for i in order[:k]]
+
+    def nearest(self, lat, lon, k=5, max_km=None):
+        """
+        Finds the k items closest to a point.
+
+        Args:
+            lat (float): Latitude of the query point.
+            lon (float): Longitude of the query point.
+            k (int, optional): Maximum number of items to return. Default is 5.
+            max_km (float, optional): Ignore items farther than this many kilometres.
+
+        Returns:
+            list of tuple: (item, distance_km) pairs, closest first.
+        """
+        if not self.items or k <= 0:
+            return []
+        row, col = int(self._cell(lat)), int(self._cell(lon))
+        found = []
+        ring = 0
+        while True:
+            if 8 * ring > len(self._buckets):
+                # Sparse grid: scanning every point is cheaper than visiting empty cells
+                indices = np.arange(len(self.items))
+                return self._result(indices, haversine_km(lat, lon, self.lats, self.lons), k, max_km)
+
+            for cell in self._ring(row, col, ring):
+                bucket = self._buckets.get(cell)
+                if bucket is not None:
+                    found.append(bucket)
+
+            # Points in unvisited cells are at least `ring` whole cells away; longitude
+            # cells shrink with the cosine of the latitude.
+            shrink = math.cos(math.radians(min(89.9, abs(lat) + (ring + 1) * self.cell_deg)))
+            bound_km = ring * self.cell_deg * KM_PER_DEGREE * shrink
+            if found:
+                indices = np.concatenate(found)
+                distances = haversine_km(lat, lon, self.lats[indices], self.lons[indices])
+                enough = len(indices) >= k and np.partition(distances, k - 1)[k - 1] <= bound_km
+                if enough or (max_km is not None and bound_km > max_km):
+                    return self._result(indices, distances, k, max_km)
+            elif max_km is not None and bound_km > max_km:
+                return []
+            ring += 1
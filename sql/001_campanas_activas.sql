@@ -0,0 +1,45 @@
+-- Estados normalizados e índice para el listado de campañas activas.
+--
+-- obtener_campanas_activas() filtra en la base de datos por
+--   estado_campana = 'En Curso' AND estado_aprobacion_hospital = 'Aprobada' AND fecha_fin >= hoy
+-- por lo que los estados deben guardarse siempre con la misma grafía.
+
+begin;
+
+-- 1. Normalizar los valores existentes (mayúsculas, espacios, acentos).
+update campana
+set estado_campana = case lower(trim(estado_campana))
+        when 'en curso' then 'En Curso'
+        when 'próxima' then 'Próxima'
+        when 'proxima' then 'Próxima'
+        when 'pendiente' then 'Pendiente'
+        when 'finalizada' then 'Finalizada'
+        when 'rechazada' then 'Rechazada'
+        else estado_campana
+    end
+where estado_campana is not null;
+
+update campana
+set estado_aprobacion_hospital = case lower(trim(estado_aprobacion_hospital))
+        when 'pendiente' then 'Pendiente'
+        when 'aprobada' then 'Aprobada'
+        when 'rechazada' then 'Rechazada'
+        else estado_aprobacion_hospital
+    end
+where estado_aprobacion_hospital is not null;
+
+-- 2. Restringir los estados a los valores que usa la aplicación.
+alter table campana drop constraint if exists campana_estado_campana_check;
+alter table campana add constraint campana_estado_campana_check
+    check (estado_campana in ('Próxima', 'En Curso', 'Pendiente', 'Finalizada', 'Rechazada'));
+
+alter table campana drop constraint if exists campana_estado_aprobacion_hospital_check;
+alter table campana add constraint campana_estado_aprobacion_hospital_check
+    check (estado_aprobacion_hospital in ('Pendiente', 'Aprobada', 'Rechazada'));
+
+-- 3. Índice parcial: solo indexa las campañas vivas, ordenadas por fecha_fin.
+create index if not exists campana_activas_fecha_fin_idx
+    on campana (fecha_fin)
+    where estado_campana = 'En Curso' and estado_aprobacion_hospital = 'Aprobada';
+
+commit;
@@ -0,0 +1,20 @@
+-- Conteo agregado de inscripciones por campaña.
+--
+-- hospital_campanas_solidarias() obtiene los conteos de todas las campañas de un
+-- hospital con una sola consulta a esta vista, en lugar de un count por campaña.
+
+begin;
+
+create index if not exists donaciones_id_campana_idx on donaciones (id_campana);
+
+create or replace view campana_inscripciones
+with (security_invoker = true) as
+select
+    c.id_campana,
+    c.id_hospital,
+    count(d.id_campana) as inscripciones
+from campana c
+left join donaciones d on d.id_campana = c.id_campana
+group by c.id_campana, c.id_hospital;
+
+commit;
@@ -0,0 +1,39 @@
+-- Login en un solo viaje a la base de datos.
+--
+-- verificar_credenciales_desde_db() llama a esta función en lugar de consultar
+-- donante, beneficiario y hospital una tras otra. Solo devuelve el tipo de
+-- usuario y su ID; la contraseña nunca sale de la base de datos.
+-- Si el mismo mail existe en varias tablas se respeta el orden original:
+-- Donante, Beneficiario, Hospital.
+
+begin;
+
+create index if not exists donante_mail_idx on donante (mail);
+create index if not exists beneficiario_mail_idx on beneficiario (mail);
+create index if not exists hospital_mail_idx on hospital (mail);
+
+create or replace function login_usuario(p_mail text, p_contrafija text)
+returns table (tipo_usuario text, id_usuario bigint)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select u.tipo_usuario, u.id_usuario
+    from (
+        select 'Donante' as tipo_usuario, id_donante::bigint as id_usuario, 1 as prioridad
+        from donante where mail = p_mail and contrafija = p_contrafija
+        union all
+        select 'Beneficiario', id_beneficiario::bigint, 2
+        from beneficiario where mail = p_mail and contrafija = p_contrafija
+        union all
+        select 'Hospital', id_hospital::bigint, 3
+        from hospital where mail = p_mail and contrafija = p_contrafija
+    ) u
+    order by u.prioridad
+    limit 1;
+$$;
+
+grant execute on function login_usuario(text, text) to anon, authenticated;
+
+commit;
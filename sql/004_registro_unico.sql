@@ -0,0 +1,33 @@
+-- Unicidad garantizada por la base de datos para los registros de usuarios.
+--
+-- registrar_donante_en_db(), registrar_beneficiario_en_db() y
+-- registrar_hospital_en_db() hacen un único INSERT; si viola alguna de estas
+-- restricciones, Inicio.py traduce el error (código 23505) al mensaje de
+-- siempre usando el nombre de la restricción.
+--
+-- Antes de aplicar, eliminar los duplicados existentes: el ALTER TABLE falla
+-- si ya hay filas repetidas.
+
+begin;
+
+alter table donante drop constraint if exists donante_dni_key;
+alter table donante add constraint donante_dni_key unique (dni);
+
+alter table donante drop constraint if exists donante_mail_key;
+alter table donante add constraint donante_mail_key unique (mail);
+
+alter table beneficiario drop constraint if exists beneficiario_mail_key;
+alter table beneficiario add constraint beneficiario_mail_key unique (mail);
+
+alter table hospital drop constraint if exists hospital_mail_key;
+alter table hospital add constraint hospital_mail_key unique (mail);
+
+alter table hospital drop constraint if exists hospital_nombre_hospital_key;
+alter table hospital add constraint hospital_nombre_hospital_key unique (nombre_hospital);
+
+-- Los índices únicos reemplazan a los índices simples por mail de 003_login_usuario.sql.
+drop index if exists donante_mail_idx;
+drop index if exists beneficiario_mail_idx;
+drop index if exists hospital_mail_idx;
+
+commit;
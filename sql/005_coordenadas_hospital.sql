@@ -0,0 +1,22 @@
+-- Coordenadas del hospital guardadas junto a la dirección.
+--
+-- actualizar_datos_hospital() y registrar_hospital_en_db() geocodifican la
+-- dirección al escribirla, así el mapa de donante_hospitales() solo lee lat/lon
+-- en lugar de geocodificar en cada visita. Las filas existentes se completan con:
+--
+--     python backfill_coordinates.py
+--
+-- lat/lon quedan en NULL si la dirección no se pudo geocodificar.
+
+begin;
+
+alter table hospital add column if not exists lat double precision;
+alter table hospital add column if not exists lon double precision;
+
+alter table hospital drop constraint if exists hospital_coordenadas_check;
+alter table hospital add constraint hospital_coordenadas_check check (
+    (lat is null and lon is null)
+    or (lat between -90 and 90 and lon between -180 and 180)
+);
+
+commit;
@@ -0,0 +1,20 @@
+-- Coordenadas del donante para buscar donantes compatibles cerca de un hospital.
+--
+-- registrar_donante_en_db() y actualizar_datos_donante() geocodifican la
+-- dirección al escribirla, igual que con los hospitales (ver
+-- 005_coordenadas_hospital.sql). Las filas existentes se completan con:
+--
+--     python backfill_coordinates.py --table donante
+
+begin;
+
+alter table donante add column if not exists lat double precision;
+alter table donante add column if not exists lon double precision;
+
+alter table donante drop constraint if exists donante_coordenadas_check;
+alter table donante add constraint donante_coordenadas_check check (
+    (lat is null and lon is null)
+    or (lat between -90 and 90 and lon between -180 and 180)
+);
+
+commit;
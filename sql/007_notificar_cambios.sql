@@ -0,0 +1,51 @@
+-- Aviso de cambios entre réplicas de la app.
+--
+-- Cada réplica guarda en memoria las lecturas más consultadas (cache.shared_get).
+-- Estos triggers envían por el canal cambios_tablas el nombre de la tabla escrita,
+-- una vez por sentencia, y functions.ChangeListener descarta las entradas de esa
+-- tabla en todas las réplicas, sin importar quién escribió (otra réplica,
+-- functions.py o el editor SQL).
+--
+-- Postgres entrega los avisos al confirmar la transacción y junta los repetidos,
+-- así una carga masiva genera un solo aviso por tabla.
+
+begin;
+
+create or replace function notificar_cambio_tabla()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform pg_notify('cambios_tablas', tg_table_name);
+    return null;
+end;
+$$;
+
+drop trigger if exists campana_notificar_cambio on campana;
+create trigger campana_notificar_cambio
+after insert or update or delete or truncate on campana
+for each statement execute function notificar_cambio_tabla();
+
+drop trigger if exists hospital_notificar_cambio on hospital;
+create trigger hospital_notificar_cambio
+after insert or update or delete or truncate on hospital
+for each statement execute function notificar_cambio_tabla();
+
+drop trigger if exists donaciones_notificar_cambio on donaciones;
+create trigger donaciones_notificar_cambio
+after insert or update or delete or truncate on donaciones
+for each statement execute function notificar_cambio_tabla();
+
+-- Las campañas embeben el tipo de sangre del beneficiario y la búsqueda de
+-- donantes de los hospitales lee la tabla donante.
+drop trigger if exists beneficiario_notificar_cambio on beneficiario;
+create trigger beneficiario_notificar_cambio
+after insert or update or delete or truncate on beneficiario
+for each statement execute function notificar_cambio_tabla();
+
+drop trigger if exists donante_notificar_cambio on donante;
+create trigger donante_notificar_cambio
+after insert or update or delete or truncate on donante
+for each statement execute function notificar_cambio_tabla();
+
+commit;
@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+
+import httpx
+from dotenv import load_dotenv
+from supabase import create_client, Client, ClientOptions
+
+from cache import shared_invalidate
+from functions import start_change_listener
+
+# Load environment variables from .env file
+load_dotenv()
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+
+# Connection pool settings for the shared HTTP client (keep-alive connections
+# are reused across reruns, sessions and pages of the same process).
+HTTP_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("SUPABASE_HTTP_MAX_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("SUPABASE_HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_TIMEOUT = float(os.environ.get("SUPABASE_HTTP_TIMEOUT", 10))
+HEALTH_CHECK_INTERVAL = float(os.environ.get("SUPABASE_HEALTH_CHECK_INTERVAL", 60))
+
+# HTTP methods PostgREST uses for inserts/upserts, updates and deletes
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_REST_PREFIX = "/rest/v1/"
+
+_lock = threading.Lock()
+_client = None
+_http_client = None
+_last_health_check = 0.0
+
+
+def _invalidate_on_write(response):
+    """
+    httpx response hook: after a successful write to /rest/v1/<table>, drops
+    the shared cache entries read from that table. Calls to /rest/v1/rpc/ are
+    function calls (e.g. login_usuario) and do not invalidate anything.
+    """
+    request = response.request
+    if request.method not in _WRITE_METHODS or not response.is_success:
+        return
+    path = request.url.path
+    if not path.startswith(_REST_PREFIX):
+        return
+    table = path[len(_REST_PREFIX):].split("/", 1)[0]
+    if table and table != "rpc":
+        shared_invalidate(table)
+
+
+def _invalidate_tables(tables):
+    """
+    Change listener callback: drops the shared cache entries of tables written
+    to by another process (another replica, functions.py, the SQL editor).
+    """
+    shared_invalidate(*tables)
+
+
+def _build_http_client():
+    """
+    Builds the pooled httpx client shared by every PostgREST request of the process.
+    """
+    return httpx.Client(
+        event_hooks={"response": [_invalidate_on_write]},
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+        http2=True,
+    )
+
+
+def _is_healthy(client, http_client):
+    """
+    Checks that the shared client can still reach Supabase.
+
+    The remote check is a HEAD request against the REST root, so it does not
+    touch any table and does not download rows.
+    """
+    if http_client is None or http_client.is_closed:
+        return False
+    try:
+        response = http_client.head(
+            str(client.rest_url),
+            headers={"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+        )
+        return response.status_code < 500
+    except httpx.HTTPError:
+        return False
+
+
+def _close_current():
+    global _client, _http_client
+    if _http_client is not None:
+        try:
+            _http_client.close()
+        except Exception:
+            pass
+    _client = None
+    _http_client = None
+
+
+def get_supabase_client() -> Client:
+    """
+    Returns the process-wide Supabase client, creating it on first use.
+
+    The client (and its pool of keep-alive HTTP connections) is shared by all
+    Streamlit sessions and script reruns. Every HEALTH_CHECK_INTERVAL seconds the
+    connection is verified and, if it is no longer usable, the client is rebuilt
+    lazily on the next call. The first call also starts the database change
+    listener (functions.start_change_listener) when SUPABASE_DB_LISTEN_PORT is
+    set, so writes made by other replicas evict this process's shared cache.
+
+    Returns:
+        supabase.Client or None: The shared client, or None if SUPABASE_URL or
+            SUPABASE_KEY are not configured.
+
+    Raises:
+        Exception: Any error raised by create_client while building a new client.
+    """
+    global _client, _http_client, _last_health_check
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        return None
+
+    with _lock:
+        now = time.monotonic()
+        client, http_client = _client, _http_client
+        check_health = client is not None and now - _last_health_check >= HEALTH_CHECK_INTERVAL
+        if check_health:
+            _last_health_check = now # Only this caller runs the check
+
+    # The remote check runs without the lock, so a slow or unreachable endpoint
+    # never blocks the sessions that only need the current client.
+    if check_health and not _is_healthy(client, http_client):
+        print("Supabase client failed its health check, reconnecting.")
+        with _lock:
+            if _client is client: # Not replaced by another caller in the meantime
+                _close_current()
+
+    with _lock:
+        if _client is None:
+            http_client = _build_http_client()
+            try:
+                _client = create_client(
+                    SUPABASE_URL,
+                    SUPABASE_KEY,
+                    options=ClientOptions(httpx_client=http_client),
+                )
+            except Exception:
+                http_client.close()
+                raise
+            _http_client = http_client
+            _last_health_check = time.monotonic()
+            start_change_listener(_invalidate_tables)
+
+        return _client
+
+
+def reset_supabase_client():
+    """
+    Discards the shared client so that the next get_supabase_client() call reconnects.
+    """
+    with _lock:
+        _close_current()
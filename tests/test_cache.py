@@ -0,0 +1,76 @@
+import threading
+
+from cache import SharedCache
+
+
+class BlockingLoader:
+    """Reads the current value of a fake table, then waits until released."""
+
+    def __init__(self, table):
+        self.table = table
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        value = self.table["value"]
+        self.started.set()
+        assert self.release.wait(5)
+        return value
+
+
+def get_in_thread(cache, key, loader, tags):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(cache.get(key, loader, tags=tags)))
+    thread.start()
+    return thread, results
+
+
+def test_concurrent_readers_share_one_load():
+    cache = SharedCache()
+    loader = BlockingLoader({"value": 1})
+    first, first_result = get_in_thread(cache, "k", loader, ("t",))
+    assert loader.started.wait(5)
+    second, second_result = get_in_thread(cache, "k", loader, ("t",))
+
+    loader.release.set()
+    first.join(5)
+    second.join(5)
+
+    assert first_result == second_result == [1]
+    assert loader.calls == 1
+
+
+def test_read_after_invalidate_does_not_join_a_load_started_before_the_write():
+    cache = SharedCache()
+    table = {"value": 1}
+    before_write = BlockingLoader(table)
+    reader, reader_result = get_in_thread(cache, "k", before_write, ("t",))
+    assert before_write.started.wait(5)
+
+    table["value"] = 2
+    cache.invalidate("t")
+    assert cache.get("k", lambda: table["value"], tags=("t",)) == 2
+
+    # The detached load still answers its own caller but does not overwrite the newer value
+    before_write.release.set()
+    reader.join(5)
+    assert reader_result == [1]
+    assert cache.get("k", lambda: 3, tags=("t",)) == 2
+
+
+def test_invalidate_leaves_loads_of_other_tables_alone():
+    cache = SharedCache()
+    loader = BlockingLoader({"value": 1})
+    reader, reader_result = get_in_thread(cache, "k", loader, ("t",))
+    assert loader.started.wait(5)
+
+    cache.invalidate("other")
+    joiner, joiner_result = get_in_thread(cache, "k", loader, ("t",))
+    loader.release.set()
+    reader.join(5)
+    joiner.join(5)
+
+    assert reader_result == joiner_result == [1]
+    assert loader.calls == 1
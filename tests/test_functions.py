@@ -0,0 +1,142 @@
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import functions
+
+
+class FakeCursor:
+    def __init__(self, copied):
+        self.copied = copied
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, statement, buffer):
+        self.copied.append(buffer.getvalue())
+
+
+class FakeConnection:
+    def __init__(self):
+        self.copied = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self.copied)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    # Composing the COPY statement needs a live connection to quote identifiers
+    monkeypatch.setattr(functions.sql.Composed, "as_string", lambda self, context: "COPY")
+    return FakeConnection()
+
+
+def test_row_batches_keeps_integer_columns_with_missing_values_as_ints():
+    frame = pd.DataFrame({"id_donante": [1, 2, 3], "edad": [30, np.nan, 41], "peso": [70.5, np.nan, 80.0]})
+
+    columns, batch = next(functions._row_batches(frame, None, 10))
+
+    assert columns == ["id_donante", "edad", "peso"]
+    assert batch == [(1, 30, 70.5), (2, None, None), (3, 41, 80.0)]
+    assert all(type(value) is int for value in (batch[0][1], batch[2][1]))
+
+
+def test_copy_writes_integer_columns_with_missing_values_without_decimals(conn):
+    frame = pd.DataFrame({"id_donante": [1, 2], "edad": [30, np.nan], "nombred": ["Ana", None]})
+
+    result = functions._bulk_insert(conn, "donante", frame, None, 10, "copy")
+
+    assert "error" not in result
+    assert result["rows"] == 2
+    assert conn.copied == ['"1","30","Ana"\n"2",,\n']
+
+
+class FakeListenConnection:
+    """Listening connection whose socket never becomes readable, like a half-open one."""
+
+    def __init__(self, **params):
+        self.params = params
+        self.dead = False
+        self.heartbeats = 0
+        self.notifies = []
+        self._socket, self._peer = socket.socketpair()
+
+    def fileno(self):
+        return self._socket.fileno()
+
+    def set_session(self, autocommit):
+        pass
+
+    def cursor(self):
+        return FakeListenCursor(self)
+
+    def poll(self):
+        pass
+
+    def close(self):
+        self._socket.close()
+        self._peer.close()
+
+
+class FakeListenCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        if statement == "SELECT 1":
+            self.conn.heartbeats += 1
+            if self.conn.dead:
+                raise functions.psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+def test_listener_reconnects_when_the_heartbeat_finds_a_dead_connection(monkeypatch):
+    for name, value in {"HOST": "db", "PORT": "6543", "NAME": "postgres", "USER": "u", "PASSWORD": "p"}.items():
+        monkeypatch.setenv(f"SUPABASE_DB_{name}", value)
+    monkeypatch.setattr(functions, "DB_LISTEN_PORT", "5432")
+    monkeypatch.setattr(functions, "DB_LISTEN_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(functions, "DB_LISTEN_BACKOFF", 0.01)
+    connections = []
+    reconnected = threading.Event()
+
+    def connect(**params):
+        connections.append(FakeListenConnection(**params))
+        # The first connection goes half-open right away: only the heartbeat can notice
+        connections[0].dead = True
+        return connections[-1]
+
+    def on_change(tables):
+        reconnected.set()
+
+    monkeypatch.setattr(functions.psycopg2, "connect", connect)
+    listener = functions.ChangeListener(on_change, tables=("campana", "hospital"))
+    listener.start()
+    try:
+        assert reconnected.wait(5)
+        assert connections[0].heartbeats == 1
+        assert listener.reconnects == 1
+        params = connections[0].params
+        assert params["port"] == "5432"
+        assert params["keepalives"] == 1
+        assert params["keepalives_idle"] == functions.DB_LISTEN_KEEPALIVES_IDLE
+        assert params["connect_timeout"] == functions.DB_LISTEN_CONNECT_TIMEOUT
+    finally:
+        listener.stop(5)
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from geocoding import (
+    ChainGeocoder, GazetteerGeocoder, GeocodeCache, Geocoder, GeocodingError, OpenCageGeocoder, RateLimiter,
+)
+
+CORDOBA_2351 = {"results": [{"geometry": {"lat": -34.5995, "lng": -58.4001}}]}
+
+
+class StubOpenCage:
+    """
+    Local stand-in for the OpenCage API (what OPENCAGE_URL points at in tests).
+
+    Each request pops the next scripted answer: (status, body, headers, delay).
+    """
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(parse_qs(urlparse(self.path).query))
+                status, body, headers, delay = stub.answers.pop(0)
+                time.sleep(delay)
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # The client gave up waiting (timeout test)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True # Do not wait for the slow answers on close
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/geocode/v1/json"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def answer(status=200, body=CORDOBA_2351, headers=None, delay=0.0):
+    return status, body, headers or {}, delay
+
+
+@pytest.fixture
+def stub():
+    stubs = []
+
+    def start(*answers):
+        stubs.append(StubOpenCage(answers))
+        return stubs[-1]
+
+    yield start
+    for s in stubs:
+        s.close()
+
+
+@pytest.fixture
+def make_geocoder(tmp_path):
+    def make(url, **kwargs):
+        options = {"timeout": 0.5, "max_retries": 3, "backoff": 0.01, "rate_limit": 1000}
+        options.update(kwargs)
+        cache = GeocodeCache(path=str(tmp_path / "geocode.sqlite3"))
+        return OpenCageGeocoder(api_key="test-key", url=url, cache=cache, **options)
+    return make
+
+
+def test_opencage_parses_the_first_result(stub, make_geocoder):
+    server = stub(answer())
+    geocoder = make_geocoder(server.url)
+
+    assert geocoder.geocode("Av. Córdoba 2351, CABA") == (-34.5995, -58.4001)
+    assert server.requests[0]["q"] == ["Av. Córdoba 2351, CABA"]
+    assert server.requests[0]["key"] == ["test-key"]
+
+
+def test_opencage_retries_429_and_5xx(stub, make_geocoder):
+    server = stub(
+        answer(503, {"status": {"message": "unavailable"}}),
+        answer(429, {"status": {"message": "rate limited"}}, headers={"Retry-After": "0"}),
+        answer(),
+    )
+    geocoder = make_geocoder(server.url)
+
+    assert geocoder.geocode("Av. Córdoba 2351, CABA") == (-34.5995, -58.4001)
+    assert len(server.requests) == 3
+
+
+def test_opencage_retries_after_a_timeout(stub, make_geocoder):
+    server = stub(answer(delay=0.5), answer())
+    geocoder = make_geocoder(server.url, timeout=0.1)
+
+    assert geocoder.geocode("Av. Córdoba 2351, CABA") == (-34.5995, -58.4001)
+    assert len(server.requests) == 2
+
+
+def test_opencage_gives_up_after_max_retries(stub, make_geocoder):
+    server = stub(*[answer(500, {})] * 3)
+    geocoder = make_geocoder(server.url, max_retries=2)
+
+    with pytest.raises(GeocodingError):
+        geocoder.geocode("Av. Córdoba 2351, CABA")
+    assert len(server.requests) == 3
+
+
+def test_opencage_does_not_retry_client_errors(stub, make_geocoder):
+    server = stub(answer(401, {"status": {"message": "invalid key"}}))
+    geocoder = make_geocoder(server.url)
+
+    with pytest.raises(GeocodingError):
+        geocoder.geocode("Av. Córdoba 2351, CABA")
+    assert len(server.requests) == 1
+
+
+def test_opencage_caches_results_and_empty_answers(stub, make_geocoder):
+    server = stub(answer(), answer(body={"results": []}))
+    geocoder = make_geocoder(server.url)
+
+    assert geocoder.geocode("Av. Córdoba 2351, CABA") == (-34.5995, -58.4001)
+    assert geocoder.geocode("av cordoba 2351 caba") == (-34.5995, -58.4001)
+    assert geocoder.geocode("Calle Inexistente 1") == (None, None)
+    assert geocoder.geocode("Calle Inexistente 1") == (None, None)
+    assert len(server.requests) == 2
+
+
+def test_opencage_geocode_many_respects_the_rate_limit(stub, make_geocoder):
+    server = stub(*[answer()] * 4)
+    geocoder = make_geocoder(server.url, rate_limit=20, max_workers=4)
+
+    started = time.monotonic()
+    results, errors = geocoder.geocode_many([f"Av. Córdoba {n}, CABA" for n in (100, 200, 300, 400)])
+
+    assert errors == {}
+    assert len(results) == 4
+    # Four requests at 20 per second need at least three intervals of 50 ms
+    assert time.monotonic() - started >= 0.15
+
+
+def test_rate_limiter_defer_pushes_back_the_next_call():
+    limiter = RateLimiter(1000)
+    limiter.defer(0.1)
+
+    started = time.monotonic()
+    limiter.wait()
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return GazetteerGeocoder()
+
+
+@pytest.mark.parametrize("address", [
+    "Av. Córdoba 2351, CABA",
+    "Av. Córdoba 2351",
+    "Córdoba 2351 CABA",
+    "Av. Cabildo 2000, Belgrano, CABA",
+    "Av. Santa Fe 3000, Palermo, C1425ABC, Argentina",
+    "Av. Callao 500, Capital Federal",
+    "Av. Corrientes 1500, Ciudad Autónoma de Buenos Aires",
+    "Pueyredon 1500",
+])
+def test_gazetteer_resolves_caba_addresses(gazetteer, address):
+    lat, lon = gazetteer.geocode(address)
+    assert -34.71 < lat < -34.52 and -58.54 < lon < -58.33
+
+
+@pytest.mark.parametrize("address", [
+    "Av. Santa Fe 1200, Rosario, Santa Fe",
+    "Av. Santa Fe 1200 Rosario",
+    "Av. Corrientes 1500, Córdoba",
+    "Av. Belgrano 1500, Avellaneda",
+    "Calle 7 n 1200, La Plata",
+    "Calle 7 1200",
+    "Cordova 2351", # Too far from "cordoba" for a confident match
+])
+def test_gazetteer_leaves_other_localities_and_generic_streets_unresolved(gazetteer, address):
+    assert gazetteer.geocode(address) == (None, None)
+
+
+class RecordingGeocoder(Geocoder):
+    def __init__(self, coordinates):
+        self.coordinates = coordinates
+        self.addresses = []
+
+    def geocode(self, address):
+        self.addresses.append(address)
+        return self.coordinates
+
+
+def test_chain_hands_addresses_outside_caba_to_the_next_backend(gazetteer):
+    rosario = (-32.9468, -60.6393)
+    remote = RecordingGeocoder(rosario)
+    chain = ChainGeocoder([gazetteer, remote])
+
+    assert chain.geocode("Av. Santa Fe 1200, Rosario, Santa Fe") == rosario
+    assert chain.geocode("Av. Córdoba 2351, CABA") == (-34.5995, -58.4001)
+    results, errors = chain.geocode_many(["Av. Corrientes 1500, Córdoba", "Av. Córdoba 2351"])
+
+    assert errors == {}
+    assert results["Av. Córdoba 2351"] == (-34.5995, -58.4001)
+    assert remote.addresses == ["Av. Santa Fe 1200, Rosario, Santa Fe", "Av. Corrientes 1500, Córdoba"]
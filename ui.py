@@ -0,0 +1,41 @@
+import streamlit as st
+
+# Key in st.session_state that holds the pending flash messages
+_FLASH_KEY = "_flash_messages"
+
+_RENDERERS = {
+    "success": st.success,
+    "info": st.info,
+    "warning": st.warning,
+    "error": st.error,
+}
+
+
+def flash(message, kind="success", balloons=False, scope="page"):
+    """
+    Queues a confirmation message to be shown on the next render.
+
+    Use it right before st.rerun() instead of showing the message and sleeping:
+    the message is kept in st.session_state and displayed once by show_flashes().
+
+    Args:
+        message (str): Markdown text to show.
+        kind (str, optional): "success", "info", "warning" or "error". Default is "success".
+        balloons (bool, optional): Also launch st.balloons() when shown. Default is False.
+        scope (str, optional): Where the message is shown. "page" messages are shown
+            at the top of the page; fragments pass their own scope and call
+            show_flashes(scope) inside the fragment. Default is "page".
+    """
+    pending = st.session_state.setdefault(_FLASH_KEY, {})
+    pending.setdefault(scope, []).append((message, kind, balloons))
+
+
+def show_flashes(scope="page"):
+    """
+    Shows and discards the flash messages queued for a scope.
+    """
+    pending = st.session_state.get(_FLASH_KEY, {})
+    for message, kind, balloons in pending.pop(scope, []):
+        _RENDERERS.get(kind, st.info)(message)
+        if balloons:
+            st.balloons()